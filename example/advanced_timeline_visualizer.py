@@ -22,20 +22,43 @@ Lynxe Agent 高级时间轴可视化工具
 """
 
 import argparse
+import bisect
+import io
 import json
+import os
+import queue
+import re
 import sys
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Iterator, TextIO, Tuple
 from enum import Enum
+from types import MappingProxyType
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     print("错误: 需要安装 requests 库")
     print("请运行: pip install requests")
     sys.exit(1)
 
+# 可选：orjson 解析/序列化更快，未安装时使用标准库
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
 
 # =============================================================================
 # 状态枚举
@@ -55,6 +78,39 @@ class ToolStatus(Enum):
     ERROR = "error"
 
 
+# =============================================================================
+# 图标与标签
+# =============================================================================
+
+_STATUS_ICONS = MappingProxyType({
+    "pending": "⏳",
+    "running": "🔄",
+    "finished": "✅",
+    "failed": "❌",
+    "error": "🔥",
+    "recovery": "🔧",
+    "warning": "⚠️"
+})
+
+_EVENT_ICONS = MappingProxyType({
+    "step_start": "📍",
+    "step_end": "🏁",
+    "think": "💭",
+    "tool_call": "🔧",
+    "error": "❌",
+    "recovery": "🔧"
+})
+
+_TYPE_LABELS = MappingProxyType({
+    "step_start": "步骤开始",
+    "step_end": "步骤完成",
+    "think": "💭 思考",
+    "tool_call": "🔧 工具",
+    "error": "❌ 错误",
+    "recovery": "🔧 修复"
+})
+
+
 # =============================================================================
 # API 客户端
 # =============================================================================
@@ -62,14 +118,31 @@ class ToolStatus(Enum):
 class LynxeClient:
     """Lynxe API 客户端"""
 
+    # 单次批量请求的最大任务数（与服务端限制一致）
+    BATCH_SIZE = 50
+
     def __init__(self, base_url: str = "http://localhost:18080"):
         self.base_url = base_url.rstrip("/")
         self.session = requests.Session()
+        self.session.headers["Connection"] = "keep-alive"
+        # 复用连接池，避免每次轮询重新建立 TCP 连接
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=2, backoff_factor=0.1)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # 条件请求缓存：plan_id -> ETag / 已解析的详情
+        self._etag: Dict[str, str] = {}
+        self._cached: Dict[str, Dict[str, Any]] = {}
+        self._batch_supported = True
+        self._events_supported = True
 
     def import_template(self, template_file: str) -> bool:
         """导入工作流模板"""
-        with open(template_file, 'r') as f:
-            template_data = json.load(f)
+        with open(template_file, 'rb') as f:
+            template_data = _loads(f.read())
 
         # 获取模板标题
         if isinstance(template_data, list):
@@ -78,13 +151,12 @@ class LynxeClient:
         template_id = template_data.get("planTemplateId", "")
         if template_id:
             # 删除已存在的模板
-            requests.delete(f"{self.base_url}/api/plan-template/details/{template_id}")
+            self.session.delete(f"{self.base_url}/api/plan-template/details/{template_id}")
 
         # 导入新模板
-        res = requests.post(
+        res = self._post_json(
             f"{self.base_url}/api/plan-template/import-all",
-            json=[template_data] if not isinstance(template_data, list) else template_data,
-            headers={"Content-Type": "application/json"}
+            [template_data] if not isinstance(template_data, list) else template_data
         )
         return res.status_code == 200
 
@@ -93,9 +165,9 @@ class LynxeClient:
         try:
             with open(file_path, 'rb') as f:
                 files = {'files': (file_path.split('/')[-1], f)}
-                res = requests.post(f"{self.base_url}/api/file-upload/upload", files=files)
+                res = self.session.post(f"{self.base_url}/api/file-upload/upload", files=files)
             if res.status_code == 200:
-                return res.json().get('uploadKey')
+                return _loads(res.content).get('uploadKey')
         except Exception as e:
             print(f"上传文件失败: {e}")
         return None
@@ -119,24 +191,153 @@ class LynxeClient:
             payload["serviceGroup"] = service_group
 
         try:
-            res = requests.post(url, json=payload, timeout=30)
+            res = self._post_json(url, payload, timeout=30)
             if res.status_code == 200:
-                return res.json().get('planId')
-        except requests.RequestException as e:
+                return _loads(res.content).get('planId')
+        except (requests.RequestException, ValueError) as e:
             print(f"启动任务失败: {e}")
         return None
 
     def get_execution_details(self, plan_id: str) -> Optional[Dict[str, Any]]:
-        """获取执行详情"""
+        """获取执行详情（内容未变化时服务端返回 304，直接复用上次结果）"""
         url = f"{self.base_url}/api/executor/details/{plan_id}"
+        headers = {}
+        if plan_id in self._etag:
+            headers["If-None-Match"] = self._etag[plan_id]
         try:
-            res = requests.get(url, timeout=30)
+            res = self.session.get(url, headers=headers, timeout=30)
+            if res.status_code == 304 and plan_id in self._cached:
+                return self._cached[plan_id]
             if res.status_code == 200:
-                return res.json()
-        except requests.RequestException:
+                details = _loads(res.content)
+                etag = res.headers.get("ETag")
+                if etag:
+                    self._etag[plan_id] = etag
+                    self._cached[plan_id] = details
+                return details
+        except (requests.RequestException, ValueError):
             pass
         return None
 
+    def get_execution_details_batch(self, plan_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量获取执行详情，返回 plan_id -> 详情（不存在的任务不在结果中）"""
+        url = f"{self.base_url}/api/executor/details/batch"
+        results: Dict[str, Dict[str, Any]] = {}
+        for i in range(0, len(plan_ids), self.BATCH_SIZE):
+            chunk = plan_ids[i:i + self.BATCH_SIZE]
+            if self._batch_supported:
+                try:
+                    res = self._post_json(url, {"planIds": chunk}, timeout=30)
+                    if res.status_code == 200:
+                        results.update(_loads(res.content))
+                        continue
+                    if res.status_code == 404:
+                        self._batch_supported = False
+                except (requests.RequestException, ValueError):
+                    pass
+
+            # 服务端不支持批量接口，或本批请求失败（5xx/网络错误），逐个获取
+            for plan_id in chunk:
+                details = self.get_execution_details(plan_id)
+                if details:
+                    results[plan_id] = details
+        return results
+
+    def get_events_since(self, plan_id: str, cursor: int) -> Optional[Tuple[int, List[Dict[str, Any]], bool]]:
+        """按游标获取增量步骤，返回 (新游标, 游标之后的步骤, 是否完成)；服务端不支持时返回 None"""
+        if not self._events_supported:
+            return None
+        url = f"{self.base_url}/api/executor/events/{plan_id}"
+        try:
+            res = self.session.get(url, params={"since": cursor}, timeout=30)
+            if res.status_code == 200:
+                data = _loads(res.content)
+                return data.get("cursor", cursor), data.get("steps") or [], data.get("completed", False)
+            if res.status_code == 405 or (res.status_code == 404 and not self._is_plan_not_found(res)):
+                # 旧版本服务端没有该接口，之后改用完整详情接口
+                self._events_supported = False
+            # 任务尚未注册时服务端返回带 planId 的 404，本次回退到详情接口，下次继续尝试
+        except (requests.RequestException, ValueError):
+            pass
+        return None
+
+    @staticmethod
+    def _is_plan_not_found(res: "requests.Response") -> bool:
+        """404 是否来自 events 接口本身（任务不存在），而不是接口缺失"""
+        try:
+            body = _loads(res.content)
+        except ValueError:
+            return False
+        return isinstance(body, dict) and "planId" in body
+
+    def _post_json(self, url: str, payload: Any, **kwargs) -> "requests.Response":
+        """以 JSON 请求体发送 POST"""
+        return self.session.post(
+            url,
+            data=_dumps(payload),
+            headers={"Content-Type": "application/json"},
+            **kwargs
+        )
+
+    def stream_events(self, plan_id: str, timeout: float = 300) -> Optional[Iterator[Dict[str, Any]]]:
+        """订阅执行进度 SSE 流，服务端不支持时返回 None；超过 timeout 秒后迭代结束"""
+        deadline = time.time() + timeout
+        url = f"{self.base_url}/api/executor/stream/{plan_id}"
+        try:
+            res = self.session.get(
+                url,
+                stream=True,
+                timeout=(5, timeout),
+                headers={"Accept": "text/event-stream"}
+            )
+        except requests.RequestException:
+            return None
+        if res.status_code != 200:
+            res.close()
+            return None
+        res.encoding = "utf-8"
+        return self._iter_sse(res, deadline)
+
+    @staticmethod
+    def _iter_sse(res: "requests.Response", deadline: float) -> Iterator[Dict[str, Any]]:
+        """
+        逐行解析 SSE 流中的 data 字段
+
+        读取在后台线程中进行，这里按剩余时间等待下一行：流长时间没有事件时
+        也能在 deadline 到达时结束，而不是等满一次读超时
+        """
+        lines: "queue.Queue[Optional[str]]" = queue.Queue()
+
+        def reader():
+            try:
+                for line in res.iter_lines(decode_unicode=True):
+                    if line and line.startswith("data:"):
+                        lines.put(line)
+            except (requests.RequestException, AttributeError, ValueError):
+                # 连接出错，或主线程超时后关闭了连接
+                pass
+            finally:
+                lines.put(None)
+
+        threading.Thread(target=reader, daemon=True).start()
+        try:
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return
+                try:
+                    line = lines.get(timeout=remaining)
+                except queue.Empty:
+                    return
+                if line is None:
+                    return
+                try:
+                    yield _loads(line[5:].strip())
+                except json.JSONDecodeError:
+                    continue
+        finally:
+            res.close()
+
 
 # =============================================================================
 # 数据模型
@@ -145,6 +346,8 @@ class LynxeClient:
 class TimelineEvent:
     """时间轴事件"""
 
+    __slots__ = ("event_type", "timestamp", "description", "status", "details", "time_str")
+
     def __init__(
         self,
         event_type: str,
@@ -158,11 +361,28 @@ class TimelineEvent:
         self.description = description
         self.status = status  # 'info', 'success', 'warning', 'error'
         self.details = details or {}
+        # 渲染时反复使用，构造时格式化一次
+        self.time_str = timestamp.strftime("%H:%M:%S") if timestamp else "--:--:--"
 
     def __repr__(self):
         return f"[{self.event_type}] {self.description}"
 
 
+def _trunc(text: str, limit: int) -> str:
+    """超过 limit 个字符时截断并追加省略号"""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _event_stats(events: List[TimelineEvent]) -> Tuple[Counter, Counter]:
+    """单次遍历统计事件类型和状态数量"""
+    by_type: Counter = Counter()
+    by_status: Counter = Counter()
+    for event in events:
+        by_type[event.event_type] += 1
+        by_status[event.status] += 1
+    return by_type, by_status
+
+
 # =============================================================================
 # 时间轴可视化器
 # =============================================================================
@@ -170,100 +390,239 @@ class TimelineEvent:
 class AdvancedTimelineVisualizer:
     """高级时间轴可视化器"""
 
+    _HTML_HEAD = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Agent 执行时间轴</title>
+    <style>
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 20px; min-height: 100vh; }
+        .container { max-width: 1200px; margin: 0 auto; background: white; border-radius: 12px; box-shadow: 0 10px 40px rgba(0,0,0,0.2); overflow: hidden; }
+        .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; }
+        .header h1 { font-size: 28px; margin-bottom: 10px; }
+        .stats { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 15px; padding: 20px 30px; background: #f8f9fa; }
+        .stat-card { background: white; padding: 15px; border-radius: 8px; text-align: center; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }
+        .stat-card .number { font-size: 32px; font-weight: bold; color: #667eea; }
+        .stat-card .label { font-size: 14px; color: #666; margin-top: 5px; }
+        .timeline { padding: 30px; }
+        .timeline-item { position: relative; padding-left: 40px; margin-bottom: 25px; }
+        .timeline-item::before { content: ""; position: absolute; left: 10px; top: 0; bottom: -25px; width: 2px; background: #e9ecef; }
+        .timeline-item:last-child::before { display: none; }
+        .timeline-dot { position: absolute; left: 3px; top: 5px; width: 16px; height: 16px; border-radius: 50%; background: #667eea; border: 3px solid white; box-shadow: 0 0 0 2px #667eea; }
+        .timeline-item.error .timeline-dot { background: #dc3545; box-shadow: 0 0 0 2px #dc3545; }
+        .timeline-item.recovery .timeline-dot { background: #ffc107; box-shadow: 0 0 0 2px #ffc107; }
+        .timeline-item.success .timeline-dot { background: #28a745; box-shadow: 0 0 0 2px #28a745; }
+        .timeline-time { font-size: 12px; color: #6c757d; margin-bottom: 5px; }
+        .timeline-content { background: #f8f9fa; padding: 15px; border-radius: 8px; }
+        .event-type { display: inline-block; padding: 3px 10px; border-radius: 12px; font-size: 12px; font-weight: bold; margin-bottom: 8px; }
+        .event-type.step { background: #e7f3ff; color: #0066cc; }
+        .event-type.think { background: #fff3cd; color: #856404; }
+        .event-type.tool { background: #d4edda; color: #155724; }
+        .event-type.error { background: #f8d7da; color: #721c24; }
+        .event-type.recovery { background: #ffeaa7; color: #d63031; }
+        .event-description { font-weight: 500; color: #333; margin-bottom: 8px; }
+        .event-details { font-size: 13px; color: #666; background: white; padding: 10px; border-radius: 6px; margin-top: 8px; }
+        .event-details strong { color: #495057; }
+        .thinking-process { background: #fffbeb; border-left: 3px solid #f59e0b; padding: 10px; margin-top: 8px; border-radius: 4px; }
+        .thinking-process .label { font-size: 11px; color: #92400e; font-weight: bold; margin-bottom: 5px; }
+        .thinking-process .content { font-size: 13px; color: #78350f; font-style: italic; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🚀 Agent 执行时间轴</h1>
+            <p>实时监控执行过程、思考过程和异常处理</p>
+        </div>
+"""
+
+    _HTML_TAIL = """        </div>
+    </div>
+</body>
+</html>"""
+
+    # 思考文本驻留池的容量：滚动 Prompt 只会与最近几轮重复，超出后淘汰最早加入的文本
+    _TEXT_POOL_SIZE = 256
+
+    _RECOVERY_TOOL = re.compile(r"repair|fix", re.IGNORECASE)
+    _ERROR_TOOL = re.compile(r"error", re.IGNORECASE)
+
+    _HTML_TABLE = str.maketrans({
+        "&": "&amp;",
+        "<": "&lt;",
+        ">": "&gt;",
+        '"': "&quot;",
+        "'": "&#x27;"
+    })
+
     def __init__(self):
-        self.events: List[TimelineEvent] = []
-        self.status_icons = {
-            "pending": "⏳",
-            "running": "🔄",
-            "finished": "✅",
-            "failed": "❌",
-            "error": "🔥",
-            "recovery": "🔧",
-            "warning": "⚠️"
-        }
+        # 以下缓存保留当前任务解析出的全部事件（内存随运行时长增长），
+        # 供增量解析、进度统计和最终报告复用；切换任务时清空
+        # 增量解析缓存：step_idx -> (签名, 事件列表)；签名为 None 表示解析时步骤已结束
+        self._step_cache: Dict[int, tuple] = {}
+        self._cache_plan_id: Optional[str] = None
+        # 按时间有序的事件列表，以及与之平行的排序键 (时间, 步骤下标, 步骤内序号)
+        self._events: List[TimelineEvent] = []
+        self._event_keys: List[tuple] = []
+        # 思考文本驻留池：相同内容的 thinkInput/thinkOutput 共享同一个字符串对象，最多保留 _TEXT_POOL_SIZE 条
+        self._text_pool: Dict[str, str] = {}
 
     def parse_execution_data(self, execution_data: Dict[str, Any]) -> List[TimelineEvent]:
-        """解析执行数据，提取时间轴事件"""
-        events = []
+        """解析执行数据，提取时间轴事件（未变化的步骤复用上次的解析结果）"""
         agent_sequence = execution_data.get("agentExecutionSequence", [])
 
+        plan_id = execution_data.get("rootPlanId")
+        if plan_id != self._cache_plan_id:
+            self._cache_plan_id = plan_id
+            self._step_cache.clear()
+            self._text_pool.clear()
+            self._events = []
+            self._event_keys = []
+
+        for step_idx in [i for i in self._step_cache if i >= len(agent_sequence)]:
+            self._remove_step_events(step_idx)
+
         for step_idx, step in enumerate(agent_sequence):
-            step_name = self._extract_step_name(step.get("agentRequest", ""), step_idx + 1)
-            start_time = self._parse_time(step.get("startTime"))
-            end_time = self._parse_time(step.get("endTime"))
-            status = step.get("status", "unknown")
+            cached = self._step_cache.get(step_idx)
+            finished = bool(step.get("endTime"))
+            if finished and cached is not None and cached[0] is None:
+                # 已结束的步骤不再变化，不必再遍历其 Think-Act 记录
+                continue
+            signature = None if finished else self._step_signature(step)
+            if cached is None or cached[0] != signature:
+                self._remove_step_events(step_idx)
+                events = self._parse_step(step, step_idx)
+                self._step_cache[step_idx] = (signature, events)
+                # 只把该步骤的事件按时间插入，不对全部事件重新排序
+                for order, event in enumerate(events):
+                    key = (event.timestamp or datetime.min, step_idx, order)
+                    pos = bisect.bisect(self._event_keys, key)
+                    self._event_keys.insert(pos, key)
+                    self._events.insert(pos, event)
+        return list(self._events)
+
+    def _remove_step_events(self, step_idx: int):
+        """从有序事件列表中移除某个步骤上次解析出的事件"""
+        cached = self._step_cache.pop(step_idx, None)
+        if cached is None:
+            return
+        for order, event in enumerate(cached[1]):
+            pos = bisect.bisect_left(self._event_keys, (event.timestamp or datetime.min, step_idx, order))
+            del self._event_keys[pos]
+            del self._events[pos]
+
+    @staticmethod
+    def _step_signature(step: Dict[str, Any]) -> tuple:
+        """未结束步骤的状态签名，用于判断是否需要重新解析（覆盖 _parse_step 读取的全部字段）"""
+        turns = tuple(
+            (
+                len(ta.get("thinkInput") or ""),
+                len(ta.get("thinkOutput") or ""),
+                tuple(
+                    (tool.get("toolName"), tool.get("toolExecuteStatus"), (tool.get("result") or "")[:200])
+                    for tool in ta.get("actToolInfoList") or ()
+                )
+            )
+            for ta in step.get("thinkActSteps") or ()
+        )
+        return (
+            str(step.get("startTime")),
+            str(step.get("endTime")),
+            step.get("status"),
+            (step.get("agentRequest") or "").partition("\n")[0],
+            turns
+        )
 
-            # 步骤开始事件
-            if start_time:
+    def _parse_step(self, step: Dict[str, Any], step_idx: int) -> List[TimelineEvent]:
+        """解析单个步骤的事件"""
+        events = []
+        step_name = self._extract_step_name(step.get("agentRequest", ""), step_idx + 1)
+        start_time = self._parse_time(step.get("startTime"))
+        end_time = self._parse_time(step.get("endTime"))
+        status = step.get("status", "unknown")
+
+        # 步骤开始事件
+        if start_time:
+            events.append(TimelineEvent(
+                event_type="step_start",
+                timestamp=start_time,
+                description=f"步骤 {step_idx + 1}: {step_name}",
+                status="running"
+            ))
+
+        # 解析 Think-Act 步骤
+        think_act_steps = step.get("thinkActSteps", [])
+        for turn_idx, ta in enumerate(think_act_steps):
+            # Think 事件
+            think_input = self._intern(ta.get("thinkInput", ""))
+            think_output = self._intern(ta.get("thinkOutput", ""))
+
+            if think_input or think_output:
                 events.append(TimelineEvent(
-                    event_type="step_start",
-                    timestamp=start_time,
-                    description=f"步骤 {step_idx + 1}: {step_name}",
-                    status="running"
+                    event_type="think",
+                    timestamp=start_time,  # 使用步骤开始时间
+                    description=f"思考过程 (Turn {turn_idx + 1})",
+                    status="info",
+                    details={
+                        "input": think_input,
+                        "output": think_output
+                    }
                 ))
 
-            # 解析 Think-Act 步骤
-            think_act_steps = step.get("thinkActSteps", [])
-            for turn_idx, ta in enumerate(think_act_steps):
-                # Think 事件
-                think_input = ta.get("thinkInput", "")
-                think_output = ta.get("thinkOutput", "")
-
-                if think_input or think_output:
-                    events.append(TimelineEvent(
-                        event_type="think",
-                        timestamp=start_time,  # 使用步骤开始时间
-                        description=f"思考过程 (Turn {turn_idx + 1})",
-                        status="info",
-                        details={
-                            "input": think_input,
-                            "output": think_output
-                        }
-                    ))
-
-                # Tool Call 事件
-                tool_calls = ta.get("actToolInfoList", [])
-                for tool in tool_calls:
-                    tool_name = tool.get("toolName", "unknown")
-                    tool_status = tool.get("toolExecuteStatus", "unknown")
-                    tool_result = tool.get("result", "")
-
-                    # 判断是否是修复工具
-                    is_recovery = "repair" in tool_name.lower() or "fix" in tool_name.lower()
-                    is_error_tool = "error" in tool_name.lower()
-
+            # Tool Call 事件
+            tool_calls = ta.get("actToolInfoList", [])
+            for tool in tool_calls:
+                tool_name = tool.get("toolName", "unknown")
+                tool_status = tool.get("toolExecuteStatus", "unknown")
+                tool_result = tool.get("result", "")
+
+                # 判断是否是修复工具（修复优先于错误工具）
+                if self._RECOVERY_TOOL.search(tool_name):
+                    event_status = "recovery"
+                elif self._ERROR_TOOL.search(tool_name):
+                    event_status = "error"
+                else:
                     event_status = "success" if tool_status == "success" else "error"
-                    if is_recovery:
-                        event_status = "recovery"
-                    elif is_error_tool:
-                        event_status = "error"
-
-                    events.append(TimelineEvent(
-                        event_type="tool_call",
-                        timestamp=start_time,
-                        description=f"工具调用: {tool_name}",
-                        status=event_status,
-                        details={
-                            "tool_name": tool_name,
-                            "status": tool_status,
-                            "result": tool_result[:200] if tool_result else ""
-                        }
-                    ))
-
-            # 步骤结束事件
-            if end_time:
-                step_status = "success" if status == "FINISHED" else "error"
+
                 events.append(TimelineEvent(
-                    event_type="step_end",
-                    timestamp=end_time,
-                    description=f"步骤 {step_idx + 1} 完成",
-                    status=step_status
+                    event_type="tool_call",
+                    timestamp=start_time,
+                    description=f"工具调用: {tool_name}",
+                    status=event_status,
+                    details={
+                        "tool_name": tool_name,
+                        "status": tool_status,
+                        "result": tool_result[:200] if tool_result else ""
+                    }
                 ))
 
-        # 按时间排序
-        events.sort(key=lambda e: e.timestamp or datetime.min)
+        # 步骤结束事件
+        if end_time:
+            step_status = "success" if status == "FINISHED" else "error"
+            events.append(TimelineEvent(
+                event_type="step_end",
+                timestamp=end_time,
+                description=f"步骤 {step_idx + 1} 完成",
+                status=step_status
+            ))
+
         return events
 
+    def _intern(self, text: str) -> str:
+        """从驻留池中取回相同内容的字符串，避免长 Prompt 重复占用内存"""
+        if not text:
+            return text
+        pooled = self._text_pool.get(text)
+        if pooled is not None:
+            return pooled
+        if len(self._text_pool) >= self._TEXT_POOL_SIZE:
+            # dict 保持插入顺序，第一个键即最早加入的文本
+            del self._text_pool[next(iter(self._text_pool))]
+        self._text_pool[text] = text
+        return text
+
     def _extract_step_name(self, agent_request: str, step_idx: int) -> str:
         """提取步骤名称"""
         lines = agent_request.split('\n')
@@ -274,18 +633,22 @@ class AdvancedTimelineVisualizer:
                 return first_line.split(":", 1)[1].strip()
         return f"步骤 {step_idx}"
 
-    def _parse_time(self, time_value: Any) -> Optional[datetime]:
-        """解析时间"""
-        if not time_value:
-            return None
-
+    @staticmethod
+    def _parse_time(time_value: Any) -> Optional[datetime]:
+        """解析时间（按类型直接选择解析路径）"""
+        value_type = type(time_value)
         try:
             # 如果是列表 [Y, M, D, H, M, S, N]
-            if isinstance(time_value, list):
-                return datetime(*time_value[:6])
+            if value_type is list:
+                if len(time_value) >= 6:
+                    return datetime(time_value[0], time_value[1], time_value[2],
+                                    time_value[3], time_value[4], time_value[5])
+                return datetime(*time_value) if time_value else None
             # 如果是字符串
-            if isinstance(time_value, str):
-                return datetime.fromisoformat(time_value.replace("Z", "+00:00"))
+            if value_type is str and time_value:
+                if time_value[-1] == "Z":
+                    time_value = time_value[:-1] + "+00:00"
+                return datetime.fromisoformat(time_value)
         except (ValueError, TypeError):
             pass
         return None
@@ -306,135 +669,93 @@ class AdvancedTimelineVisualizer:
 
         # 渲染每个事件
         for event in events:
-            icon = self.status_icons.get(event.status, "📌")
-            time_str = event.timestamp.strftime("%H:%M:%S") if event.timestamp else "--:--:--"
+            icon = _STATUS_ICONS.get(event.status, "📌")
 
             # 事件描述
-            desc = event.description[:50] + "..." if len(event.description) > 50 else event.description
+            desc = _trunc(event.description, 50)
 
-            line = f"║ {icon} {time_str} │ {desc:<55} ║"
+            line = f"║ {icon} {event.time_str} │ {desc:<55} ║"
             lines.append(line)
 
             # 显示详细信息
             if event.details:
-                if "input" in event.details and event.details["input"]:
-                    input_text = event.details["input"][:60] + "..." if len(event.details["input"]) > 60 else event.details["input"]
-                    lines.append(f"║     💭 思考: {input_text:<55} ║")
-                if "output" in event.details and event.details["output"]:
-                    output_text = event.details["output"][:60] + "..." if len(event.details["output"]) > 60 else event.details["output"]
-                    lines.append(f"║     💡 结果: {output_text:<55} ║")
-                if "result" in event.details and event.details["result"]:
-                    result_text = event.details["result"][:60] + "..." if len(event.details["result"]) > 60 else event.details["result"]
-                    lines.append(f"║     📄 返回: {result_text:<55} ║")
+                input_text = event.details.get("input")
+                if input_text:
+                    lines.append(f"║     💭 思考: {_trunc(input_text, 60):<55} ║")
+                output_text = event.details.get("output")
+                if output_text:
+                    lines.append(f"║     💡 结果: {_trunc(output_text, 60):<55} ║")
+                result_text = event.details.get("result")
+                if result_text:
+                    lines.append(f"║     📄 返回: {_trunc(result_text, 60):<55} ║")
 
         lines.append("╚" + "═" * (width - 2) + "╝")
 
         return "\n".join(lines)
 
-    def render_markdown_timeline(self, events: List[TimelineEvent], execution_data: Dict[str, Any]) -> str:
-        """渲染 Markdown 时间轴"""
-        lines = ["# Agent 执行报告\n"]
-        lines.append("## 📊 执行时间轴\n")
-
+    def render_markdown_timeline(self, events: List[TimelineEvent], execution_data: Dict[str, Any], out: TextIO) -> None:
+        """渲染 Markdown 时间轴，直接写入 out"""
         # 统计信息
-        total_steps = len([e for e in events if e.event_type == "step_start"])
-        total_thinks = len([e for e in events if e.event_type == "think"])
-        total_tools = len([e for e in events if e.event_type == "tool_call"])
-        errors = len([e for e in events if e.status == "error"])
-        recoveries = len([e for e in events if e.status == "recovery"])
-
-        lines.append("### 统计信息")
-        lines.append(f"- 总步骤数: {total_steps}")
-        lines.append(f"- 思考过程: {total_thinks}")
-        lines.append(f"- 工具调用: {total_tools}")
-        lines.append(f"- 错误数量: {errors}")
-        lines.append(f"- 修复操作: {recoveries}\n")
-
-        # 时间轴
-        lines.append("### 详细时间线")
-        lines.append("| 时间 | 事件 | 状态 | 详情 |")
-        lines.append("|------|------|------|------|")
+        by_type, by_status = _event_stats(events)
+        total_steps = by_type["step_start"]
+        total_thinks = by_type["think"]
+        total_tools = by_type["tool_call"]
+        errors = by_status["error"]
+        recoveries = by_status["recovery"]
+
+        out.write(
+            "# Agent 执行报告\n\n"
+            "## 📊 执行时间轴\n\n"
+            "### 统计信息\n"
+            f"- 总步骤数: {total_steps}\n"
+            f"- 思考过程: {total_thinks}\n"
+            f"- 工具调用: {total_tools}\n"
+            f"- 错误数量: {errors}\n"
+            f"- 修复操作: {recoveries}\n\n"
+            # 时间轴
+            "### 详细时间线\n"
+            "| 时间 | 事件 | 状态 | 详情 |\n"
+            "|------|------|------|------|"
+        )
 
         for event in events:
-            time_str = event.timestamp.strftime("%H:%M:%S") if event.timestamp else "--:--:--"
-            icon = self.status_icons.get(event.status, "📌")
+            icon = _STATUS_ICONS.get(event.status, "📌")
             desc = event.description.replace("|", "\\|")
 
-            details = ""
-            if event.details:
-                if "input" in event.details:
-                    details = event.details["input"][:30] + "..." if len(event.details.get("input", "")) > 30 else event.details.get("input", "")
+            details = _trunc(event.details.get("input", ""), 30) if event.details else ""
 
-            lines.append(f"| {time_str} | {desc} | {icon} {event.status} | {details} |")
+            out.write(f"\n| {event.time_str} | {desc} | {icon} {event.status} | {details} |")
 
-        return "\n".join(lines)
+    def render_markdown_timeline_str(self, events: List[TimelineEvent], execution_data: Dict[str, Any]) -> str:
+        """渲染 Markdown 时间轴并返回字符串"""
+        buf = io.StringIO()
+        self.render_markdown_timeline(events, execution_data, buf)
+        return buf.getvalue()
 
-    def render_html_timeline(self, events: List[TimelineEvent], execution_data: Dict[str, Any]) -> str:
-        """渲染 HTML 时间轴"""
-        html = ['<!DOCTYPE html>']
-        html.append('<html lang="zh-CN">')
-        html.append('<head>')
-        html.append('    <meta charset="UTF-8">')
-        html.append('    <meta name="viewport" content="width=device-width, initial-scale=1.0">')
-        html.append('    <title>Agent 执行时间轴</title>')
-        html.append('    <style>')
-        html.append('        * { margin: 0; padding: 0; box-sizing: border-box; }')
-        html.append('        body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 20px; min-height: 100vh; }')
-        html.append('        .container { max-width: 1200px; margin: 0 auto; background: white; border-radius: 12px; box-shadow: 0 10px 40px rgba(0,0,0,0.2); overflow: hidden; }')
-        html.append('        .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; }')
-        html.append('        .header h1 { font-size: 28px; margin-bottom: 10px; }')
-        html.append('        .stats { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 15px; padding: 20px 30px; background: #f8f9fa; }')
-        html.append('        .stat-card { background: white; padding: 15px; border-radius: 8px; text-align: center; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }')
-        html.append('        .stat-card .number { font-size: 32px; font-weight: bold; color: #667eea; }')
-        html.append('        .stat-card .label { font-size: 14px; color: #666; margin-top: 5px; }')
-        html.append('        .timeline { padding: 30px; }')
-        html.append('        .timeline-item { position: relative; padding-left: 40px; margin-bottom: 25px; }')
-        html.append('        .timeline-item::before { content: ""; position: absolute; left: 10px; top: 0; bottom: -25px; width: 2px; background: #e9ecef; }')
-        html.append('        .timeline-item:last-child::before { display: none; }')
-        html.append('        .timeline-dot { position: absolute; left: 3px; top: 5px; width: 16px; height: 16px; border-radius: 50%; background: #667eea; border: 3px solid white; box-shadow: 0 0 0 2px #667eea; }')
-        html.append('        .timeline-item.error .timeline-dot { background: #dc3545; box-shadow: 0 0 0 2px #dc3545; }')
-        html.append('        .timeline-item.recovery .timeline-dot { background: #ffc107; box-shadow: 0 0 0 2px #ffc107; }')
-        html.append('        .timeline-item.success .timeline-dot { background: #28a745; box-shadow: 0 0 0 2px #28a745; }')
-        html.append('        .timeline-time { font-size: 12px; color: #6c757d; margin-bottom: 5px; }')
-        html.append('        .timeline-content { background: #f8f9fa; padding: 15px; border-radius: 8px; }')
-        html.append('        .event-type { display: inline-block; padding: 3px 10px; border-radius: 12px; font-size: 12px; font-weight: bold; margin-bottom: 8px; }')
-        html.append('        .event-type.step { background: #e7f3ff; color: #0066cc; }')
-        html.append('        .event-type.think { background: #fff3cd; color: #856404; }')
-        html.append('        .event-type.tool { background: #d4edda; color: #155724; }')
-        html.append('        .event-type.error { background: #f8d7da; color: #721c24; }')
-        html.append('        .event-type.recovery { background: #ffeaa7; color: #d63031; }')
-        html.append('        .event-description { font-weight: 500; color: #333; margin-bottom: 8px; }')
-        html.append('        .event-details { font-size: 13px; color: #666; background: white; padding: 10px; border-radius: 6px; margin-top: 8px; }')
-        html.append('        .event-details strong { color: #495057; }')
-        html.append('        .thinking-process { background: #fffbeb; border-left: 3px solid #f59e0b; padding: 10px; margin-top: 8px; border-radius: 4px; }')
-        html.append('        .thinking-process .label { font-size: 11px; color: #92400e; font-weight: bold; margin-bottom: 5px; }')
-        html.append('        .thinking-process .content { font-size: 13px; color: #78350f; font-style: italic; }')
-        html.append('    </style>')
-        html.append('</head>')
-        html.append('<body>')
-        html.append('    <div class="container">')
-        html.append('        <div class="header">')
-        html.append('            <h1>🚀 Agent 执行时间轴</h1>')
-        html.append('            <p>实时监控执行过程、思考过程和异常处理</p>')
-        html.append('        </div>')
+    def render_html_timeline(self, events: List[TimelineEvent], execution_data: Dict[str, Any], out: TextIO) -> None:
+        """渲染 HTML 时间轴，直接写入 out"""
+        out.write(self._HTML_HEAD)
 
         # 统计
-        total_steps = len([e for e in events if e.event_type == "step_start"])
-        total_thinks = len([e for e in events if e.event_type == "think"])
-        total_tools = len([e for e in events if e.event_type == "tool_call"])
-        errors = len([e for e in events if e.status == "error"])
-        recoveries = len([e for e in events if e.status == "recovery"])
-
-        html.append('        <div class="stats">')
-        html.append(f'            <div class="stat-card"><div class="number">{total_steps}</div><div class="label">总步骤</div></div>')
-        html.append(f'            <div class="stat-card"><div class="number">{total_thinks}</div><div class="label">思考过程</div></div>')
-        html.append(f'            <div class="stat-card"><div class="number">{total_tools}</div><div class="label">工具调用</div></div>')
-        html.append(f'            <div class="stat-card"><div class="number">{errors}</div><div class="label">错误</div></div>')
-        html.append(f'            <div class="stat-card"><div class="number">{recoveries}</div><div class="label">修复操作</div></div>')
-        html.append('        </div>')
+        by_type, by_status = _event_stats(events)
+        total_steps = by_type["step_start"]
+        total_thinks = by_type["think"]
+        total_tools = by_type["tool_call"]
+        errors = by_status["error"]
+        recoveries = by_status["recovery"]
+
+        out.write(
+            f'        <div class="stats">\n'
+            f'            <div class="stat-card"><div class="number">{total_steps}</div><div class="label">总步骤</div></div>\n'
+            f'            <div class="stat-card"><div class="number">{total_thinks}</div><div class="label">思考过程</div></div>\n'
+            f'            <div class="stat-card"><div class="number">{total_tools}</div><div class="label">工具调用</div></div>\n'
+            f'            <div class="stat-card"><div class="number">{errors}</div><div class="label">错误</div></div>\n'
+            f'            <div class="stat-card"><div class="number">{recoveries}</div><div class="label">修复操作</div></div>\n'
+            f'        </div>\n'
+        )
 
         # 时间轴
-        html.append('        <div class="timeline">')
+        out.write('        <div class="timeline">\n')
 
         for event in events:
             item_class = "timeline-item"
@@ -445,65 +766,62 @@ class AdvancedTimelineVisualizer:
             elif event.status == "success":
                 item_class += " success"
 
-            html.append(f'            <div class="{item_class}">')
-            html.append('                <div class="timeline-dot"></div>')
-
+            time_html = ""
             if event.timestamp:
-                html.append(f'                <div class="timeline-time">{event.timestamp.strftime("%H:%M:%S")}</div>')
-
-            html.append('                <div class="timeline-content">')
-
-            # 事件类型标签
-            type_labels = {
-                "step_start": "步骤开始",
-                "step_end": "步骤完成",
-                "think": "💭 思考",
-                "tool_call": "🔧 工具",
-                "error": "❌ 错误",
-                "recovery": "🔧 修复"
-            }
-            type_class = "step" if "step" in event.event_type else event.event_type
-            html.append(f'                    <span class="event-type {type_class}">{type_labels.get(event.event_type, event.event_type)}</span>')
-
-            html.append(f'                    <div class="event-description">{self._escape_html(event.description)}</div>')
+                time_html = f'                <div class="timeline-time">{event.time_str}</div>\n'
 
             # 详细信息
+            details_html = ""
             if event.details:
                 if "input" in event.details and event.details["input"]:
-                    html.append('                    <div class="thinking-process">')
-                    html.append('                        <div class="label">思考输入</div>')
-                    html.append(f'                        <div class="content">{self._escape_html(event.details["input"][:200])}</div>')
-                    html.append('                    </div>')
-
+                    details_html += (
+                        f'                    <div class="thinking-process">\n'
+                        f'                        <div class="label">思考输入</div>\n'
+                        f'                        <div class="content">{self._escape_html(event.details["input"][:200])}</div>\n'
+                        f'                    </div>\n'
+                    )
                 if "output" in event.details and event.details["output"]:
-                    html.append('                    <div class="thinking-process">')
-                    html.append('                        <div class="label">思考输出</div>')
-                    html.append(f'                        <div class="content">{self._escape_html(event.details["output"][:200])}</div>')
-                    html.append('                    </div>')
-
+                    details_html += (
+                        f'                    <div class="thinking-process">\n'
+                        f'                        <div class="label">思考输出</div>\n'
+                        f'                        <div class="content">{self._escape_html(event.details["output"][:200])}</div>\n'
+                        f'                    </div>\n'
+                    )
                 if "result" in event.details and event.details["result"]:
-                    html.append('                    <div class="event-details">')
-                    html.append(f'                        <strong>结果:</strong> {self._escape_html(event.details["result"][:200])}')
-                    html.append('                    </div>')
+                    details_html += (
+                        f'                    <div class="event-details">\n'
+                        f'                        <strong>结果:</strong> {self._escape_html(event.details["result"][:200])}\n'
+                        f'                    </div>\n'
+                    )
 
-            html.append('                </div>')
-            html.append('            </div>')
-
-        html.append('        </div>')
-        html.append('    </div>')
-        html.append('</body>')
-        html.append('</html>')
-
-        return "\n".join(html)
+            # 事件类型标签
+            type_class = "step" if "step" in event.event_type else event.event_type
+            type_label = _TYPE_LABELS.get(event.event_type, event.event_type)
+
+            out.write(
+                f'            <div class="{item_class}">\n'
+                f'                <div class="timeline-dot"></div>\n'
+                f'{time_html}'
+                f'                <div class="timeline-content">\n'
+                f'                    <span class="event-type {type_class}">{type_label}</span>\n'
+                f'                    <div class="event-description">{self._escape_html(event.description)}</div>\n'
+                f'{details_html}'
+                f'                </div>\n'
+                f'            </div>\n'
+            )
+
+        out.write(self._HTML_TAIL)
+
+    def render_html_timeline_str(self, events: List[TimelineEvent], execution_data: Dict[str, Any]) -> str:
+        """渲染 HTML 时间轴并返回字符串"""
+        buf = io.StringIO()
+        self.render_html_timeline(events, execution_data, buf)
+        return buf.getvalue()
 
     @staticmethod
     def _escape_html(text: str) -> str:
         """转义 HTML"""
-        return (text.replace("&", "&amp;")
-                   .replace("<", "&lt;")
-                   .replace(">", "&gt;")
-                   .replace('"', "&quot;")
-                   .replace("'", "&#x27;"))
+        return text.translate(AdvancedTimelineVisualizer._HTML_TABLE)
 
 
 # =============================================================================
@@ -513,94 +831,210 @@ class AdvancedTimelineVisualizer:
 class RealtimeMonitor:
     """实时监控器"""
 
+    # 批量监控时，任务连续取不到详情的次数达到该值才视为不存在
+    MAX_BATCH_MISSES = 3
+
     def __init__(self, client: LynxeClient, visualizer: AdvancedTimelineVisualizer):
         self.client = client
         self.visualizer = visualizer
-        self.processed_steps = set()
         self.spinner_frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
         self.spinner_idx = 0
+        # 预编码的清行前缀 + 旋转帧，以及上次统计 -> 编码后进度文本的缓存
+        self._spinner_bytes = [f"\x1b[2K\r{frame} ".encode("utf-8") for frame in self.spinner_frames]
+        self._progress_key: Optional[tuple] = None
+        self._progress_bytes = b""
+        self._last_event_count = 0
+        # 轮询间隔：有新事件时回到下限，空闲时逐步放大
+        self._poll_min = 0.1
+        self._poll_max = 2.0
+        self._poll = self._poll_min
 
     def monitor(self, plan_id: str, timeout: int = 300) -> Optional[Dict[str, Any]]:
-        """实时监控任务执行"""
+        """实时监控任务执行（优先使用 SSE 推送，不可用时回退到轮询）"""
         print(f"\n🚀 开始监控任务: {plan_id}")
         print("=" * 80)
 
-        start_time = time.time()
-        last_event_count = 0
-
-        while time.time() - start_time < timeout:
-            details = self.client.get_execution_details(plan_id)
+        deadline = time.time() + timeout
+        self._last_event_count = 0
+        self._poll = self._poll_min
+
+        # SSE 推送：服务端只发送新增步骤
+        stream = self.client.stream_events(plan_id, deadline - time.time())
+        if stream is not None:
+            sequence: List[Dict[str, Any]] = []
+            for delta in stream:
+                delta_type = delta.get("type")
+                if delta_type == "progress":
+                    sequence.extend(delta.get("newSteps") or [])
+                    events = self._show_new_events({"agentExecutionSequence": sequence})
+                    self._print_progress(events, len(sequence))
+                elif delta_type == "done":
+                    # 推送的步骤可能不是最终状态，完成后拉取一次完整详情
+                    details = self.client.get_execution_details(plan_id)
+                    if details and details.get("completed", False):
+                        self._show_new_events(details)
+                        return self._finish(details)
+                    break
+                elif delta_type == "error":
+                    # 推送出错时回退到轮询，由轮询确认任务是否存在
+                    print(f"\n⚠️ 推送中断: {delta.get('message', '未知错误')}，改为轮询")
+                    break
+                if time.time() >= deadline:
+                    break
+
+        # 轮询：SSE 不可用或流提前结束。优先按游标只拉取增量步骤
+        sequence = []
+        cursor = 0
+        while time.time() < deadline:
+            delta = self.client.get_events_since(plan_id, cursor)
+            if delta is not None:
+                next_cursor, steps, completed = delta
+                # 游标之前的步骤已结束不再变化，之后的步骤用最新数据替换
+                del sequence[cursor:]
+                sequence.extend(steps)
+                cursor = next_cursor
+                details = {"rootPlanId": plan_id, "agentExecutionSequence": sequence, "completed": completed}
+                if completed:
+                    # 完成后拉取一次完整详情（含最终结果）
+                    details = self.client.get_execution_details(plan_id) or details
+            else:
+                details = self.client.get_execution_details(plan_id)
             if not details:
                 print(f"❌ 无法获取任务详情")
                 return None
 
-            # 解析事件
-            events = self.visualizer.parse_execution_data(details)
-
-            # 显示新事件
-            if len(events) > last_event_count:
-                for event in events[last_event_count:]:
-                    self._print_event(event)
-                last_event_count = len(events)
+            event_count = self._last_event_count
+            events = self._show_new_events(details)
 
             # 检查是否完成
             if details.get("completed", False):
-                print("\n" + "=" * 80)
-                print("✅ 任务完成!")
-                return details
+                return self._finish(details)
 
             # 显示进度
             self._print_progress(events, len(details.get("agentExecutionSequence", [])))
-            time.sleep(1)
+
+            if self._last_event_count > event_count:
+                self._poll = self._poll_min
+            else:
+                self._poll = min(self._poll * 1.5, self._poll_max)
+            time.sleep(self._poll)
 
         print("\n⚠️ 监控超时")
         return None
 
+    def monitor_batch(self, plan_ids: List[str], timeout: int = 300) -> Dict[str, Dict[str, Any]]:
+        """同时监控多个任务，每次轮询只发起一次批量请求"""
+        print(f"\n🚀 开始监控 {len(plan_ids)} 个任务")
+        print("=" * 80)
+
+        deadline = time.time() + timeout
+        visualizers = {plan_id: AdvancedTimelineVisualizer() for plan_id in plan_ids}
+        event_counts = dict.fromkeys(plan_ids, 0)
+        pending = list(plan_ids)
+        misses = dict.fromkeys(plan_ids, 0)
+        finished: Dict[str, Dict[str, Any]] = {}
+        poll = self._poll_min
+
+        while pending and time.time() < deadline:
+            batch = self.client.get_execution_details_batch(pending)
+            has_new_events = False
+
+            for plan_id in list(pending):
+                details = batch.get(plan_id)
+                if not details:
+                    # 偶发失败时下一轮重试，连续多次取不到才放弃
+                    misses[plan_id] += 1
+                    if misses[plan_id] >= self.MAX_BATCH_MISSES:
+                        print(f"\n❌ 无法获取任务详情: {plan_id}")
+                        pending.remove(plan_id)
+                        del visualizers[plan_id]
+                    continue
+                misses[plan_id] = 0
+
+                events = visualizers[plan_id].parse_execution_data(details)
+                if len(events) > event_counts[plan_id]:
+                    print(f"\n── {plan_id} ──")
+                    for event in events[event_counts[plan_id]:]:
+                        self._print_event(event)
+                    event_counts[plan_id] = len(events)
+                    has_new_events = True
+
+                if details.get("completed", False):
+                    print(f"\n✅ 任务完成: {plan_id}")
+                    finished[plan_id] = details
+                    pending.remove(plan_id)
+                    # 结束的任务不再解析，释放其事件缓存（最终报告由调用方重新解析）
+                    del visualizers[plan_id]
+
+            if not pending:
+                break
+
+            poll = self._poll_min if has_new_events else min(poll * 1.5, self._poll_max)
+            time.sleep(poll)
+
+        if pending:
+            print(f"\n⚠️ 监控超时，未完成: {', '.join(pending)}")
+        return finished
+
+    def _show_new_events(self, details: Dict[str, Any]) -> List[TimelineEvent]:
+        """解析执行数据并打印新增事件"""
+        events = self.visualizer.parse_execution_data(details)
+        if len(events) > self._last_event_count:
+            for event in events[self._last_event_count:]:
+                self._print_event(event)
+            self._last_event_count = len(events)
+        return events
+
+    @staticmethod
+    def _finish(details: Dict[str, Any]) -> Dict[str, Any]:
+        """打印完成信息"""
+        print("\n" + "=" * 80)
+        print("✅ 任务完成!")
+        return details
+
     def _print_event(self, event: TimelineEvent):
         """打印单个事件"""
-        icons = {
-            "step_start": "📍",
-            "step_end": "🏁",
-            "think": "💭",
-            "tool_call": "🔧",
-            "error": "❌",
-            "recovery": "🔧"
-        }
+        icon = _EVENT_ICONS.get(event.event_type, "📌")
 
-        icon = icons.get(event.event_type, "📌")
-        time_str = event.timestamp.strftime("%H:%M:%S") if event.timestamp else "--:--:--"
-
-        print(f"\n{icon} [{time_str}] {event.description}")
+        print(f"\n{icon} [{event.time_str}] {event.description}")
 
         # 显示详细信息
         if event.details:
-            if "input" in event.details and event.details["input"]:
-                input_text = event.details["input"][:100] + "..." if len(event.details["input"]) > 100 else event.details["input"]
-                print(f"   🤔 思考: {input_text}")
+            input_text = event.details.get("input")
+            if input_text:
+                print(f"   🤔 思考: {_trunc(input_text, 100)}")
 
-            if "output" in event.details and event.details["output"]:
-                output_text = event.details["output"][:100] + "..." if len(event.details["output"]) > 100 else event.details["output"]
-                print(f"   💡 输出: {output_text}")
+            output_text = event.details.get("output")
+            if output_text:
+                print(f"   💡 输出: {_trunc(output_text, 100)}")
 
-            if "result" in event.details and event.details["result"]:
-                result_text = event.details["result"][:100] + "..." if len(event.details["result"]) > 100 else event.details["result"]
-                print(f"   📄 结果: {result_text}")
+            result_text = event.details.get("result")
+            if result_text:
+                print(f"   📄 结果: {_trunc(result_text, 100)}")
 
     def _print_progress(self, events: List[TimelineEvent], step_count: int):
         """打印进度"""
-        spinner = self.spinner_frames[self.spinner_idx % len(self.spinner_frames)]
+        spinner = self._spinner_bytes[self.spinner_idx % len(self._spinner_bytes)]
         self.spinner_idx += 1
 
         # 统计
-        steps_done = len([e for e in events if e.event_type == "step_end"])
-        thinks = len([e for e in events if e.event_type == "think"])
-        tools = len([e for e in events if e.event_type == "tool_call"])
-        errors = len([e for e in events if e.status == "error"])
-        recoveries = len([e for e in events if e.status == "recovery"])
-
-        progress = f"\r{spinner} 步骤: {steps_done}/{step_count} | 思考: {thinks} | 工具: {tools} | 错误: {errors} | 修复: {recoveries}"
-        sys.stdout.write(progress)
+        by_type, by_status = _event_stats(events)
+        steps_done = by_type["step_end"]
+        thinks = by_type["think"]
+        tools = by_type["tool_call"]
+        errors = by_status["error"]
+        recoveries = by_status["recovery"]
+
+        key = (steps_done, step_count, thinks, tools, errors, recoveries)
+        if key != self._progress_key:
+            self._progress_key = key
+            self._progress_bytes = (
+                f"步骤: {steps_done}/{step_count} | 思考: {thinks} | 工具: {tools} | 错误: {errors} | 修复: {recoveries}"
+            ).encode("utf-8")
+
+        # 先刷出 print 缓冲的事件输出，再一次系统调用写出进度行
         sys.stdout.flush()
+        os.write(sys.stdout.fileno(), spinner + self._progress_bytes)
 
 
 # =============================================================================
@@ -615,10 +1049,11 @@ def main():
 
     # 执行模式
     parser.add_argument("--execute", "-e", help="工具名称")
-    parser.add_argument("--plan-id", "-p", help="任务 ID")
+    parser.add_argument("--plan-id", "-p", action="append", help="任务 ID（可重复指定，同时监控多个任务）")
     parser.add_argument("--params", help="替换参数 (JSON)")
     parser.add_argument("--service-group", "-g", help="服务组")
     parser.add_argument("--upload-key", "-u", help="文件上传 Key")
+    parser.add_argument("--upload", help="执行前上传的文件路径（上传后使用返回的 Key）")
     parser.add_argument("--template", "-t", help="模板文件路径")
 
     # 输出格式
@@ -637,15 +1072,30 @@ def main():
     visualizer = AdvancedTimelineVisualizer()
     monitor = RealtimeMonitor(client, visualizer)
 
-    plan_id = args.plan_id
-
-    # 导入模板（如果指定）
-    if args.template:
-        print(f"📦 导入模板: {args.template}")
-        if client.import_template(args.template):
-            print("✅ 模板导入成功")
-        else:
-            print("❌ 模板导入失败")
+    plan_ids = list(args.plan_id or [])
+
+    # 导入模板与上传文件互不依赖，并行执行
+    upload_key = args.upload_key
+    if args.template or args.upload:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            template_future = executor.submit(client.import_template, args.template) if args.template else None
+            upload_future = executor.submit(client.upload_file, args.upload) if args.upload else None
+
+            if template_future:
+                print(f"📦 导入模板: {args.template}")
+                if template_future.result():
+                    print("✅ 模板导入成功")
+                else:
+                    print("❌ 模板导入失败")
+
+            if upload_future:
+                print(f"📤 上传文件: {args.upload}")
+                upload_key = upload_future.result()
+                if upload_key:
+                    print(f"✅ 文件上传成功: {upload_key}")
+                else:
+                    print("❌ 文件上传失败")
+                    sys.exit(1)
 
     # 执行任务
     if args.execute:
@@ -660,7 +1110,7 @@ def main():
         plan_id = client.execute_async(
             tool_name=args.execute,
             replacement_params=params,
-            upload_key=args.upload_key,
+            upload_key=upload_key,
             service_group=args.service_group
         )
 
@@ -669,11 +1119,32 @@ def main():
             sys.exit(1)
 
         print(f"✅ 任务已启动: {plan_id}")
+        plan_ids.append(plan_id)
 
-    if not plan_id:
+    if not plan_ids:
         parser.error("必须指定 --execute 或 --plan-id")
+    if len(plan_ids) > 1 and args.output_file:
+        parser.error("--output-file 只能用于单个任务")
+
+    # 多个任务：批量监控，逐个输出
+    if len(plan_ids) > 1:
+        if args.no_monitor:
+            results = client.get_execution_details_batch(plan_ids)
+        else:
+            results = monitor.monitor_batch(plan_ids, args.timeout)
+
+        if not results:
+            print("❌ 无法获取执行数据")
+            sys.exit(1)
+
+        for plan_id in plan_ids:
+            if plan_id in results:
+                print(f"\n══ {plan_id} ══")
+                _write_output(AdvancedTimelineVisualizer(), results[plan_id], args.output, None)
+        return
 
     # 监控或获取结果
+    plan_id = plan_ids[0]
     if args.no_monitor:
         execution_data = client.get_execution_details(plan_id)
     else:
@@ -683,28 +1154,32 @@ def main():
         print("❌ 无法获取执行数据")
         sys.exit(1)
 
-    # 生成输出
+    _write_output(visualizer, execution_data, args.output, args.output_file)
+
+
+def _write_output(visualizer: AdvancedTimelineVisualizer, execution_data: Dict[str, Any],
+                  output: str, output_file: Optional[str]):
+    """按输出格式渲染时间轴，写入文件或标准输出"""
     events = visualizer.parse_execution_data(execution_data)
 
-    if args.output == "console":
+    if output == "console":
         print("\n" + visualizer.render_ascii_timeline(events))
-    elif args.output == "markdown":
-        md = visualizer.render_markdown_timeline(events, execution_data)
-        if args.output_file:
-            with open(args.output_file, "w", encoding="utf-8") as f:
-                f.write(md)
-            print(f"✅ Markdown 报告已保存: {args.output_file}")
+    elif output == "markdown":
+        if output_file:
+            with open(output_file, "w", encoding="utf-8") as f:
+                visualizer.render_markdown_timeline(events, execution_data, f)
+            print(f"✅ Markdown 报告已保存: {output_file}")
         else:
-            print(md)
-    elif args.output == "html":
-        html = visualizer.render_html_timeline(events, execution_data)
-        if args.output_file:
-            with open(args.output_file, "w", encoding="utf-8") as f:
-                f.write(html)
-            print(f"✅ HTML 报告已保存: {args.output_file}")
+            visualizer.render_markdown_timeline(events, execution_data, sys.stdout)
+            print()
+    elif output == "html":
+        if output_file:
+            with open(output_file, "w", encoding="utf-8") as f:
+                visualizer.render_html_timeline(events, execution_data, f)
+            print(f"✅ HTML 报告已保存: {output_file}")
         else:
-            print(html)
-
+            visualizer.render_html_timeline(events, execution_data, sys.stdout)
+            print()
 
 if __name__ == "__main__":
     main()
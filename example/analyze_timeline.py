@@ -1,124 +1,263 @@
+# Pure Python with optional accelerators only, so it runs unchanged under PyPy
+# (`pypy3 analyze_timeline.py <json_path> <output_path>`), whose JIT suits the
+# per-step string rendering on large traces.
+import argparse
+import functools
 import json
+import operator
+import os
 import sys
-import datetime
+
+try:
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps_indent(obj):
+        # orjson can't escape non-ASCII; fall back so output matches json.dumps
+        text = orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+        return text if text.isascii() else json.dumps(obj, indent=2)
+except ImportError:
+    _loads = json.loads
+
+    def _dumps_indent(obj):
+        return json.dumps(obj, indent=2)
+
+# Optional: stream large traces step by step instead of loading the whole document
+# (ijson picks its fastest available backend, yajl2_c when installed)
+try:
+    import ijson
+    # ijson's parse errors don't derive from ValueError
+    _PARSE_ERRORS = (ValueError, ijson.JSONError)
+except ImportError:
+    ijson = None
+    _PARSE_ERRORS = (ValueError,)
+
+# Below this size one orjson/json load is faster than ijson's two streaming passes
+_STREAM_MIN_BYTES = 64 * 1024 * 1024
+
+_NL = "\n"
+_NLQ = "\n> "
+
+# Fixed markdown fragments, shared across steps instead of rebuilt per write
+_REPORT_TITLE = "# Execution Timeline Report\n\n"
+_HDR_REQ = "### 📋 Request (Prompt)\n"
+_HDR_REASONING = "### 🤔 Reasoning & Actions\n"
+_HDR_COMPLETION = "### 🏁 Step Completion (Result)\n"
+_FENCE_TEXT = "```text\n"
+_FENCE_END = "\n```\n\n"
+_NO_STEPS = "> *No intermediate think-act steps recorded (Direct termination or simple execution)*\n\n"
+_DIVIDER = "---\n"
+_RESULT_OPEN = "**Result:**\n```\n"
+_RESULT_CLOSE = "\n```\n\n"
+_TRUNC_LIMIT = 500
+_TRUNC_SUFFIX = "... (truncated)"
+
+_HEADER_KEYS = ('currentPlanId', 'title', 'startTime', 'endTime', 'completed')
+
+_PARSER = argparse.ArgumentParser(
+    description="Render an execution timeline JSON as a markdown report.",
+    epilog="For many traces, reuse one interpreter instead of one process per file: "
+           "python3 -c \"from analyze_timeline import analyze_timeline; "
+           "[analyze_timeline(j, o) for j, o in pairs]\"",
+)
+_PARSER.add_argument('json_path', help="PlanExecutionRecord JSON file")
+_PARSER.add_argument('output_path', help="markdown file to write")
+
+@functools.lru_cache(maxsize=4096)
+def _format_time_fields(fields):
+    # fields is typically (year, month, day, hour, minute, second, nanos);
+    # trailing zero fields may be omitted. Format the fields directly, no datetime/strftime.
+    try:
+        _, _, _, h, m, s, nanos = (*fields, 0, 0, 0, 0)[:7]
+        return f"{h:02d}:{m:02d}:{s:02d}.{nanos // 1_000_000:03d}"
+    except Exception:
+        return str(list(fields))
 
 def format_time(timestamp_list):
     if not timestamp_list:
         return "N/A"
-    # timestamp_list is typically [year, month, day, hour, minute, second, nanos]
+    if not isinstance(timestamp_list, list):
+        return str(timestamp_list)
+    # Step end/start times and turn record times repeat a lot: memoize per timestamp
     try:
-        dt = datetime.datetime(*timestamp_list[:6])
-        # Add micros/nanos if present
-        if len(timestamp_list) > 6:
-            dt = dt.replace(microsecond=int(timestamp_list[6] / 1000))
-        return dt.strftime("%H:%M:%S.%f")[:-3]
-    except Exception:
+        return _format_time_fields(tuple(timestamp_list))
+    except TypeError:
         return str(timestamp_list)
 
-def safe_get(d, key, default=None):
-    return d.get(key, default)
+def _step_sort_key(steps):
+    # itemgetter runs in C; only fall back to a Python lambda when some step lacks
+    # currentStep or has it null (sorted as step 0)
+    if all(isinstance(step.get('currentStep'), int) for step in steps):
+        return operator.itemgetter('currentStep')
+    return lambda x: x.get('currentStep') or 0
+
+def _in_step_order(steps, key):
+    keys = list(map(key, steps))
+    return all(a <= b for a, b in zip(keys, keys[1:]))
+
+def _scan_timeline(json_path):
+    # First streaming pass: top-level header fields plus the currentStep of every step.
+    # It walks the whole document, so a malformed file fails here, before any output.
+    header = {}
+    order = []
+    with open(json_path, 'rb') as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if prefix == 'agentExecutionSequence.item':
+                if event == 'start_map':
+                    order.append(0)
+            elif prefix == 'agentExecutionSequence.item.currentStep':
+                if value is not None:
+                    order[-1] = value
+            elif prefix in _HEADER_KEYS:
+                if event == 'start_array':
+                    header[prefix] = []
+                elif event not in ('end_array', 'start_map', 'end_map', 'map_key'):
+                    header[prefix] = value
+            elif prefix.endswith('.item') and prefix[:-5] in _HEADER_KEYS:
+                if isinstance(header.get(prefix[:-5]), list):
+                    header[prefix[:-5]].append(value)
+    return header, order
+
+def _iter_steps(json_path):
+    with open(json_path, 'rb') as f:
+        yield from ijson.items(f, 'agentExecutionSequence.item', use_float=True)
+
+def load_timeline(json_path):
+    if ijson is None or os.path.getsize(json_path) < _STREAM_MIN_BYTES:
+        with open(json_path, 'rb') as f:
+            data = _loads(f.read())
+        steps = data.get('agentExecutionSequence', [])
+        # The recorder emits steps in currentStep order; only sort when it did not
+        key = _step_sort_key(steps)
+        if not _in_step_order(steps, key):
+            steps.sort(key=key)
+        return data, steps
+
+    header, order = _scan_timeline(json_path)
+    steps = _iter_steps(json_path)
+    if order != sorted(order):
+        # Producer emitted steps out of order: buffer them to sort
+        steps = list(steps)
+        steps.sort(key=_step_sort_key(steps))
+    return header, steps
+
+def _parse_top_level(data):
+    return {
+        'plan_id': data.get('currentPlanId', 'Unknown'),
+        'title': data.get('title', 'Unknown Plan'),
+        'start_time': format_time(data.get('startTime')),
+        'end_time': format_time(data.get('endTime')),
+        'status': 'Completed' if data.get('completed') else 'Running/Failed',
+    }
+
+def _render_step(step, fmt=format_time):
+    # Markdown for one step, collected in a list and joined once
+    parts = []
+    write = parts.append
+    get = step.get
+
+    step_idx = get('currentStep', '?')
+    agent_req = get('agentRequest', 'No Goal')
+    # Extract first line of request as header if multi-line
+    req_header = agent_req.split('\n')[0] if agent_req else "Step " + str(step_idx)
+
+    s_start = fmt(get('startTime'))
+    s_end = fmt(get('endTime'))
+
+    write(f"## Step {step_idx}: {req_header}\n")
+    write(f"**Time:** {s_start} - {s_end}\n")
+    write(f"**Agent:** {get('agentName', 'Unknown')}\n\n")
+
+    # Agent Request Full
+    write(_HDR_REQ)
+    write(f"{_FENCE_TEXT}{agent_req}{_FENCE_END}")
+
+    # Think-Act Steps (Detailed Reasoning)
+    think_acts = get('thinkActSteps', [])
+    if think_acts:
+        write(_HDR_REASONING)
+        for i, ta in enumerate(think_acts):
+            t_time = fmt(ta.get('recordTime'))
+            write(f"#### Turn {i+1} ({t_time})\n")
+
+            think_output = ta.get('thinkOutput', '')
+
+            if think_output:
+                write(f"**Thinking Process:**\n> {_NLQ.join(think_output.split(_NL))}\n\n")
+
+            # Tool Calls
+            tools = ta.get('actToolInfoList', [])
+            for tool in tools:
+                t_name = tool.get('toolName', 'Unknown')
+                t_args = tool.get('args', '{}')
+                t_res = tool.get('result', '')
+
+                write(f"**🛠️ Tool Call:** `{t_name}`\n")
+                write(f"**Args:** `{t_args}`\n")
+                if t_res:
+                    # Truncate long results
+                    write(_RESULT_OPEN)
+                    write(t_res if len(t_res) < _TRUNC_LIMIT else f"{t_res[:_TRUNC_LIMIT]}{_TRUNC_SUFFIX}")
+                    write(_RESULT_CLOSE)
+    else:
+        write(_NO_STEPS)
+
+    # Final Step Result (Latest Method)
+    latest_method = get('latestMethodName')
+    latest_args = get('latestMethodArgs')
+
+    if latest_method == 'default-terminate':
+        write(_HDR_COMPLETION)
+        # Try to parse arguments if they are JSON string
+        try:
+            if isinstance(latest_args, str):
+                args_json = _loads(latest_args)
+                # Extract the key message
+                if isinstance(args_json, dict) and 'message' in args_json:
+                    msg_list = args_json['message']
+                    for msg in msg_list:
+                        for k, v in msg.items():
+                            write(f"**{k}:**\n{v}\n\n")
+                else:
+                     write(f"```json\n{latest_args}\n```\n\n")
+            else:
+                write(f"```json\n{_dumps_indent(latest_args)}\n```\n\n")
+        except:
+            write(f"```\n{latest_args}\n```\n\n")
+
+    write(_DIVIDER)
+    return ''.join(parts)
 
 def analyze_timeline(json_path, output_path):
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data, steps = load_timeline(json_path)
     except Exception as e:
         print(f"Error reading JSON file: {e}")
         sys.exit(1)
 
+    header = _parse_top_level(data)
     with open(output_path, 'w', encoding='utf-8') as out:
-        plan_id = data.get('currentPlanId', 'Unknown')
-        title = data.get('title', 'Unknown Plan')
-        start_time = format_time(data.get('startTime'))
-        end_time = format_time(data.get('endTime'))
-
-        out.write(f"# Execution Timeline Report\n\n")
-        out.write(f"**Plan Title:** {title}\n")
-        out.write(f"**Plan ID:** {plan_id}\n")
-        out.write(f"**Start Time:** {start_time}\n")
-        out.write(f"**End Time:** {end_time}\n")
-        out.write(f"**Status:** {'Completed' if data.get('completed') else 'Running/Failed'}\n\n")
+        out.writelines((
+            _REPORT_TITLE,
+            f"**Plan Title:** {header['title']}\n",
+            f"**Plan ID:** {header['plan_id']}\n",
+            f"**Start Time:** {header['start_time']}\n",
+            f"**End Time:** {header['end_time']}\n",
+            f"**Status:** {header['status']}\n\n",
+        ))
 
-        steps = data.get('agentExecutionSequence', [])
-        steps.sort(key=lambda x: safe_get(x, 'currentStep', 0))
-
-        for step in steps:
-            step_idx = step.get('currentStep', '?')
-            agent_req = step.get('agentRequest', 'No Goal')
-            # Extract first line of request as header if multi-line
-            req_header = agent_req.split('\n')[0] if agent_req else "Step " + str(step_idx)
-            
-            s_start = format_time(step.get('startTime'))
-            s_end = format_time(step.get('endTime'))
-            
-            out.write(f"## Step {step_idx}: {req_header}\n")
-            out.write(f"**Time:** {s_start} - {s_end}\n")
-            out.write(f"**Agent:** {step.get('agentName', 'Unknown')}\n\n")
-
-            # Agent Request Full
-            out.write(f"### 📋 Request (Prompt)\n")
-            out.write(f"```text\n{agent_req}\n```\n\n")
-
-            # Think-Act Steps (Detailed Reasoning)
-            think_acts = step.get('thinkActSteps', [])
-            if think_acts:
-                out.write(f"### 🤔 Reasoning & Actions\n")
-                for i, ta in enumerate(think_acts):
-                    t_time = format_time(ta.get('recordTime'))
-                    out.write(f"#### Turn {i+1} ({t_time})\n")
-                    
-                    think_input = ta.get('thinkInput', '')
-                    think_output = ta.get('thinkOutput', '')
-                    
-                    if think_output:
-                        out.write(f"**Thinking Process:**\n> {think_output.replace(chr(10), chr(10)+'> ')}\n\n")
-                    
-                    # Tool Calls
-                    tools = ta.get('actToolInfoList', [])
-                    for tool in tools:
-                        t_name = tool.get('toolName', 'Unknown')
-                        t_args = tool.get('args', '{}')
-                        t_res = tool.get('result', '')
-                        
-                        out.write(f"**🛠️ Tool Call:** `{t_name}`\n")
-                        out.write(f"**Args:** `{t_args}`\n")
-                        if t_res:
-                            # Truncate long results
-                            display_res = t_res if len(t_res) < 500 else t_res[:500] + "... (truncated)"
-                            out.write(f"**Result:**\n```\n{display_res}\n```\n\n")
-            else:
-                out.write(f"> *No intermediate think-act steps recorded (Direct termination or simple execution)*\n\n")
-
-            # Final Step Result (Latest Method)
-            latest_method = step.get('latestMethodName')
-            latest_args = step.get('latestMethodArgs')
-            
-            if latest_method == 'default-terminate':
-                out.write(f"### 🏁 Step Completion (Result)\n")
-                # Try to parse arguments if they are JSON string
-                try:
-                    if isinstance(latest_args, str):
-                        args_json = json.loads(latest_args)
-                        # Extract the key message
-                        if isinstance(args_json, dict) and 'message' in args_json:
-                            msg_list = args_json['message']
-                            for msg in msg_list:
-                                for k, v in msg.items():
-                                    out.write(f"**{k}:**\n{v}\n\n")
-                        else:
-                             out.write(f"```json\n{latest_args}\n```\n\n")
-                    else:
-                        out.write(f"```json\n{json.dumps(latest_args, indent=2)}\n```\n\n")
-                except:
-                    out.write(f"```\n{latest_args}\n```\n\n")
-            
-            out.write("---\n")
+        try:
+            for step in steps:
+                out.write(_render_step(step))
+        except _PARSE_ERRORS as e:
+            # Streamed steps are parsed while writing; don't leave a partial report
+            out.close()
+            os.remove(output_path)
+            print(f"Error reading JSON file: {e}")
+            sys.exit(1)
 
     print(f"Timeline report generated at: {output_path}")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python3 analyze_timeline.py <json_path> <output_path>")
-        sys.exit(1)
-    
-    analyze_timeline(sys.argv[1], sys.argv[2])
+    args = _PARSER.parse_args()
+    analyze_timeline(args.json_path, args.output_path)
@@ -5,13 +5,82 @@
 使用模拟数据展示实时监控界面的效果
 """
 
+import itertools
 import time
 import sys
 import os
+import unicodedata
+
+# 可选：wcwidth 给出更准确的终端显示宽度，未安装时按东亚宽度估算
+try:
+    from wcwidth import wcwidth as _wcwidth
+
+    def _char_width(ch):
+        return max(_wcwidth(ch), 0)
+except ImportError:
+    def _char_width(ch):
+        return 2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1
 
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+SPINNER_FRAMES = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
+
+# 进度行模板：同行刷新（\r 回到行首）
+_FRAME_FORMAT = "\r{spinner:<7} [{bar}] {percent:3d}% | {name} | {elapsed:5.1f}s".format
+
+
+def clip_to_width(text, width, ellipsis="..."):
+    """按终端显示宽度截断并补齐文本（中文等宽字符占 2 列）"""
+    total = sum(_char_width(ch) for ch in text)
+    if total > width:
+        budget = width - len(ellipsis)
+        used = 0
+        for idx, ch in enumerate(text):
+            w = _char_width(ch)
+            if used + w > budget:
+                text = text[:idx] + ellipsis
+                total = used + len(ellipsis)
+                break
+            used += w
+    return text + " " * (width - total)
+
+
+def run_step_progress(spinner_iter, step_index, total_steps, step_name, step_duration, elapsed):
+    """模拟步骤执行过程，同行刷新动态进度条，返回累计耗时"""
+    step_name = clip_to_width(step_name, 18)
+
+    bar_width = 20
+    frame_interval = 0.1
+
+    # 进度帧直接写入文件描述符，绕过文本层；先刷出 print 缓冲保证顺序
+    sys.stdout.flush()
+    stdout_fd = sys.stdout.fileno()
+
+    # 以 perf_counter 计时：按帧边界休眠，耗时不随渲染开销和 sleep 精度漂移
+    start = time.perf_counter()
+    next_frame = start
+    while True:
+        next_frame += frame_interval
+        time.sleep(max(0.0, next_frame - time.perf_counter()))
+        step_elapsed = time.perf_counter() - start
+
+        # 更新进度条
+        step_fraction = min(step_elapsed / step_duration, 1.0)
+        progress_percent = int(((step_index + step_fraction) / total_steps) * 100)
+        filled = int(bar_width * progress_percent / 100)
+        bar = "█" * filled + "░" * (bar_width - filled)
+
+        spinner = next(spinner_iter)
+
+        # 同行更新进度条
+        frame = _FRAME_FORMAT(spinner=spinner, bar=bar, percent=progress_percent, name=step_name,
+                              elapsed=elapsed + step_elapsed)
+        os.write(stdout_fd, frame.encode("utf-8"))
+
+        if step_elapsed >= step_duration:
+            return elapsed + step_elapsed
+
 
 def demo_realtime_progress():
     """演示实时进度条的效果"""
@@ -25,8 +94,7 @@ def demo_realtime_progress():
     print(f"{'状态':<8} {'进度':<30} {'步骤':<20} {'耗时'}")
     print("-" * 70)
 
-    spinner_frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
-    spinner_idx = 0
+    spinner_iter = itertools.cycle(SPINNER_FRAMES)
 
     steps = [
         {"name": "读取和验证数据文件", "duration": 2.5, "has_think": True},
@@ -39,33 +107,8 @@ def demo_realtime_progress():
     elapsed = 0
 
     for i, step in enumerate(steps):
-        # 模拟步骤执行过程
-        step_elapsed = 0
-        step_duration = step["duration"]
-
         # 在步骤执行过程中显示动态进度
-        while step_elapsed < step_duration:
-            step_elapsed += 0.1
-            elapsed += 0.1
-
-            # 更新进度条
-            progress_percent = int(((i + step_elapsed / step_duration) / total_steps) * 100)
-            bar_width = 20
-            filled = int(bar_width * progress_percent / 100)
-            bar = "█" * filled + "░" * (bar_width - filled)
-
-            spinner = spinner_frames[spinner_idx % len(spinner_frames)]
-            spinner_idx += 1
-
-            step_name = step["name"]
-            if len(step_name) > 18:
-                step_name = step_name[:15] + "..."
-
-            # 同行更新进度条
-            sys.stdout.write(f"\r{spinner:<7} [{bar}] {progress_percent:3d}% | {step_name:<18} | {elapsed:5.1f}s")
-            sys.stdout.flush()
-
-            time.sleep(0.1)
+        elapsed = run_step_progress(spinner_iter, i, total_steps, step["name"], step["duration"], elapsed)
 
         # 步骤完成，打印详细信息
         print()  # 换行
@@ -110,8 +153,7 @@ def demo_error_recovery():
     print(f"{'状态':<8} {'进度':<30} {'步骤':<20} {'耗时'}")
     print("-" * 70)
 
-    spinner_frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
-    spinner_idx = 0
+    spinner_iter = itertools.cycle(SPINNER_FRAMES)
 
     # 模拟一个有错误的执行流程
     scenario = [
@@ -126,30 +168,8 @@ def demo_error_recovery():
     elapsed = 0
 
     for i, step in enumerate(scenario):
-        step_elapsed = 0
-        step_duration = step["duration"]
-
         # 动态进度更新
-        while step_elapsed < step_duration:
-            step_elapsed += 0.1
-            elapsed += 0.1
-
-            progress_percent = int(((i + step_elapsed / step_duration) / total_steps) * 100)
-            bar_width = 20
-            filled = int(bar_width * progress_percent / 100)
-            bar = "█" * filled + "░" * (bar_width - filled)
-
-            spinner = spinner_frames[spinner_idx % len(spinner_frames)]
-            spinner_idx += 1
-
-            step_name = step["name"]
-            if len(step_name) > 18:
-                step_name = step_name[:15] + "..."
-
-            sys.stdout.write(f"\r{spinner:<7} [{bar}] {progress_percent:3d}% | {step_name:<18} | {elapsed:5.1f}s")
-            sys.stdout.flush()
-
-            time.sleep(0.1)
+        elapsed = run_step_progress(spinner_iter, i, total_steps, step["name"], step["duration"], elapsed)
 
         print()
 
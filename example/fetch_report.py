@@ -1,7 +1,62 @@
+import argparse
 import sys
 import json
 import base64
+import shutil
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Optional: parse the response straight off the socket, keeping only the fields we use
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_SCALAR_EVENTS = frozenset(("string", "number", "boolean", "null"))
+
+_PARSER = argparse.ArgumentParser(description="Save a file from a plan's workspace to the local disk.")
+_PARSER.add_argument("plan_id", help="plan ID that owns the file")
+_PARSER.add_argument("remote_path", help="file path inside the plan directory")
+_PARSER.add_argument("local_path", help="where to write the file")
+
+# Shared session: keep-alive connections are reused across fetches from the same host
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
+# Base64 characters decoded per chunk (a multiple of 4, so every chunk decodes on its own).
+# This bounds the decoded bytes held at once; the base64 string itself is still read whole,
+# since ijson only hands out complete string values.
+_B64_CHUNK = 4 * 65536
+
+def _read_envelope(response):
+    if ijson is None:
+        return _loads(response.content)
+    # Stream-parse {"success", "message", "data": {...}} without buffering the raw body
+    response.raw.decode_content = True
+    data = {}
+    file_data = {}
+    for prefix, event, value in ijson.parse(response.raw):
+        if event not in _SCALAR_EVENTS:
+            continue
+        if prefix in ("success", "message"):
+            data[prefix] = value
+        elif prefix.startswith("data.") and prefix.count(".") == 1:
+            file_data[prefix[5:]] = value
+    data["data"] = file_data
+    return data
 
 def fetch_and_save_report(plan_id, file_path, output_path):
     url = f"http://localhost:18080/api/file-browser/content/{plan_id}"
@@ -9,13 +64,13 @@ def fetch_and_save_report(plan_id, file_path, output_path):
     
     try:
         print(f"Fetching {file_path} from plan {plan_id}...")
-        response = requests.get(url, params=params)
-        
-        if response.status_code != 200:
-            print(f"Error fetching file: {response.status_code} - {response.text}")
-            sys.exit(1)
-            
-        data = response.json()
+        with _SESSION.get(url, params=params, stream=True, timeout=30) as response:
+            if response.status_code != 200:
+                print(f"Error fetching file: {response.status_code} - {response.text}")
+                sys.exit(1)
+
+            data = _read_envelope(response)
+
         if not data.get("success"):
              print(f"API Error: {data.get('message')}")
              sys.exit(1)
@@ -26,9 +81,20 @@ def fetch_and_save_report(plan_id, file_path, output_path):
         
         if is_binary and content:
             print("Decoding Base64 content...")
-            decoded_bytes = base64.b64decode(content)
             with open(output_path, 'wb') as f:
-                f.write(decoded_bytes)
+                for i in range(0, len(content), _B64_CHUNK):
+                    f.write(base64.b64decode(content[i:i + _B64_CHUNK]))
+        elif file_data.get("downloadOnly"):
+            # No inline content (PDF, Office, archives): stream the raw file to disk
+            print("Downloading file...")
+            download_url = f"http://localhost:18080/api/file-browser/download/{plan_id}"
+            with _SESSION.get(download_url, params=params, stream=True, timeout=30) as download:
+                if download.status_code != 200:
+                    print(f"Error downloading file: {download.status_code}")
+                    sys.exit(1)
+                download.raw.decode_content = True
+                with open(output_path, 'wb') as f:
+                    shutil.copyfileobj(download.raw, f, 1 << 16)
         else:
             print("Writing text content...")
             with open(output_path, 'w', encoding='utf-8') as f:
@@ -41,8 +107,5 @@ def fetch_and_save_report(plan_id, file_path, output_path):
         sys.exit(1)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 4:
-        print("Usage: python3 fetch_report.py <plan_id> <remote_path> <local_path>")
-        sys.exit(1)
-        
-    fetch_and_save_report(sys.argv[1], sys.argv[2], sys.argv[3])
+    args = _PARSER.parse_args()
+    fetch_and_save_report(args.plan_id, args.remote_path, args.local_path)
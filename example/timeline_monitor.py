@@ -16,14 +16,20 @@ Lynxe Agent 时间轴监控与可视化工具
 
     # 生成 Markdown 报告
     python timeline_monitor.py --plan-id plan-xxx --output markdown --output-file report.md
+
+    # 强制使用轮询（默认优先 SSE 推送，服务端不支持时自动回退）
+    python timeline_monitor.py --plan-id plan-xxx --poll
 """
 
 import argparse
 import json
+import re
 import sys
+import threading
 import time
 from datetime import datetime
-from typing import Optional, Dict, List, Any
+from functools import lru_cache
+from typing import Optional, Dict, List, Any, Iterator, NamedTuple
 
 try:
     import requests
@@ -32,6 +38,102 @@ except ImportError:
     print("请运行: pip install requests")
     sys.exit(1)
 
+# 可选：orjson 解析更快（直接接受 bytes），未安装时使用标准库
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+# =============================================================================
+# 通用工具函数
+# =============================================================================
+
+def _shorten(text: str, width: int) -> str:
+    """截断到最多 width 个字符，超出时以单个省略号结尾"""
+    return text if len(text) <= width else f"{text[:width - 1]}…"
+
+
+def _parse_time(time_str: Optional[str]) -> Optional[datetime]:
+    """解析时间字符串（非字符串值返回 None）"""
+    if not time_str or not isinstance(time_str, str):
+        return None
+    return _parse_iso_time(time_str)
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso_time(time_str: str) -> Optional[datetime]:
+    """解析 ISO 时间字符串，同一时间戳在各渲染器间会被反复解析，结果按字符串缓存"""
+    try:
+        # Java LocalDateTime 格式: 2025-01-21T12:34:56.123456（不带时区，直接解析）
+        if time_str.endswith("Z"):
+            return datetime.fromisoformat(time_str[:-1] + "+00:00")
+        return datetime.fromisoformat(time_str)
+    except ValueError:
+        return None
+
+
+# =============================================================================
+# HTML 报告模板
+# =============================================================================
+
+# 报告样式，导入时生成一次，渲染时随头部整体输出
+_HTML_CSS = """\
+        body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif; margin: 20px; background: #f5f5f5; }
+        .container { max-width: 1000px; margin: 0 auto; background: white; padding: 20px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+        h1 { color: #333; border-bottom: 2px solid #007bff; padding-bottom: 10px; }
+        h2 { color: #555; margin-top: 30px; }
+        .overview { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; margin: 20px 0; }
+        .overview-item { background: #f8f9fa; padding: 15px; border-radius: 6px; border-left: 4px solid #007bff; }
+        .overview-item strong { display: block; color: #666; font-size: 12px; }
+        .overview-item span { font-size: 24px; font-weight: bold; color: #333; }
+        .timeline { margin: 20px 0; }
+        .step { margin: 15px 0; padding: 15px; background: #f8f9fa; border-radius: 6px; border-left: 4px solid #28a745; }
+        .step.error { border-left-color: #dc3545; }
+        .step-header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px; }
+        .step-title { font-weight: bold; font-size: 16px; }
+        .step-duration { color: #666; font-size: 14px; }
+        .think-act { margin: 10px 0; padding: 10px; background: white; border-radius: 4px; }
+        .think-input { color: #6c757d; font-style: italic; margin-bottom: 8px; }
+        .tool-call { display: flex; align-items: center; gap: 8px; padding: 8px; background: #e9ecef; border-radius: 4px; }
+        .tool-name { font-family: monospace; font-weight: bold; }
+        .tool-success { color: #28a745; }
+        .tool-error { color: #dc3545; }
+        .tool-result { margin-top: 8px; padding: 8px; background: #f8f9fa; border-radius: 4px; font-size: 12px; }"""
+
+# 报告中不随数据变化的头部与尾部
+_HTML_HEAD = f"""\
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Agent 执行报告</title>
+    <style>
+{_HTML_CSS}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>Agent 执行报告</h1>"""
+
+_HTML_TAIL = """\
+        </div>
+    </div>
+</body>
+</html>"""
+
+# HTML 特殊字符转义表，str.translate 一次遍历完成全部替换
+_HTML_ESCAPE = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;",
+})
+
 
 # =============================================================================
 # API 客户端
@@ -42,8 +144,25 @@ class LynxeClient:
 
     def __init__(self, base_url: str = "http://localhost:8080"):
         self.base_url = base_url.rstrip("/")
+        # 所有请求共用一个 Session，复用 keep-alive 连接，避免每次轮询重新握手
         self.session = requests.Session()
-        self.session.headers.update({"Content-Type": "application/json"})
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Connection": "keep-alive"
+        })
+        # 条件请求缓存：plan_id -> 上次响应的 ETag / 已解析的详情
+        self._etags: Dict[str, str] = {}
+        self._cached_details: Dict[str, Dict[str, Any]] = {}
+
+    def close(self):
+        """关闭 Session 持有的连接"""
+        self.session.close()
+
+    def __enter__(self) -> "LynxeClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def execute_async(
         self,
@@ -82,15 +201,20 @@ class LynxeClient:
             payload["serviceGroup"] = service_group
 
         try:
-            response = requests.post(url, json=payload, timeout=30)
+            response = self.session.post(url, json=payload, timeout=30)
             response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return _loads(response.content)
+        except (requests.RequestException, ValueError) as e:
             raise RuntimeError(f"启动任务失败: {e}")
 
-    def get_execution_details(self, plan_id: str) -> Optional[Dict[str, Any]]:
+    def get_execution_details(
+        self,
+        plan_id: str,
+        since_step: Optional[int] = None,
+        since_turn: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
         """
-        获取完整执行详情
+        获取完整执行详情（或指定 since_step 时只获取增量）
 
         响应格式：PlanExecutionRecord JSON
         - rootPlanId
@@ -108,37 +232,104 @@ class LynxeClient:
                     - parameters
                     - result
                     - toolExecuteStatus
+
+        增量请求：since_step 为客户端已有的步骤数，since_turn 为其最后一步已有的
+        Think-Act 记录数，响应只包含客户端还没有的部分：
+        - stepOffset: 第一个返回步骤的下标（客户端最后一步可能仍在运行，会重新返回）
+        - turnOffset: 第一个返回步骤中第一条 Think-Act 记录的下标
+        - stepCount / completed
+        - steps: 从 stepOffset 开始的步骤
+        旧版服务端会忽略增量参数并返回完整详情（含 agentExecutionSequence）
+
+        带 If-None-Match 发起条件请求：内容未变化时服务端返回 304，
+        直接返回上次缓存的同一个 dict 对象（调用方可用 is 判断未变化）
         """
         url = f"{self.base_url}/api/executor/details/{plan_id}"
+        params = {}
+        if since_step is not None:
+            params["sinceStep"] = since_step
+            params["sinceTurn"] = since_turn or 0
+        headers = {}
+        etag = self._etags.get(plan_id)
+        if etag is not None:
+            headers["If-None-Match"] = etag
         try:
-            response = requests.get(url, timeout=30)
+            response = self.session.get(url, params=params, headers=headers, timeout=30)
+            if response.status_code == 304 and plan_id in self._cached_details:
+                return self._cached_details[plan_id]
             if response.status_code == 404:
                 return None
             response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            details = _loads(response.content)
+        except (requests.RequestException, ValueError) as e:
             raise RuntimeError(f"获取执行详情失败: {e}")
 
+        etag = response.headers.get("ETag")
+        if etag:
+            self._etags[plan_id] = etag
+            self._cached_details[plan_id] = details
+        return details
+
     def get_task_status(self, plan_id: str) -> Dict[str, Any]:
         """获取任务状态（轻量级）"""
         url = f"{self.base_url}/api/executor/taskStatus/{plan_id}"
         try:
-            response = requests.get(url, timeout=30)
+            response = self.session.get(url, timeout=30)
             response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return _loads(response.content)
+        except (requests.RequestException, ValueError) as e:
             raise RuntimeError(f"获取任务状态失败: {e}")
 
     def stop_task(self, plan_id: str) -> Dict[str, Any]:
         """停止运行中的任务"""
         url = f"{self.base_url}/api/executor/stopTask/{plan_id}"
         try:
-            response = requests.post(url, timeout=30)
+            response = self.session.post(url, timeout=30)
             response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return _loads(response.content)
+        except (requests.RequestException, ValueError) as e:
             raise RuntimeError(f"停止任务失败: {e}")
 
+    def stream_events(self, plan_id: str, timeout: float = 300) -> Optional[Iterator[Dict[str, Any]]]:
+        """
+        订阅执行进度 SSE 流，服务端不支持时返回 None
+
+        GET /api/executor/stream/{planId}
+        - {"type": "connected"}
+        - {"type": "progress", "completed": bool, "stepCount": int, "newSteps": [...]}
+        - {"type": "done", "finalResult": ...}
+        - {"type": "error", "message": "..."}
+        """
+        url = f"{self.base_url}/api/executor/stream/{plan_id}"
+        try:
+            response = self.session.get(
+                url,
+                stream=True,
+                timeout=(5, timeout),
+                headers={"Accept": "text/event-stream"}
+            )
+        except requests.RequestException:
+            return None
+        if response.status_code != 200:
+            response.close()
+            return None
+        return self._iter_sse(response)
+
+    @staticmethod
+    def _iter_sse(response: "requests.Response") -> Iterator[Dict[str, Any]]:
+        """逐行解析 SSE 流中的 data 字段，连接中断时结束迭代"""
+        with response:
+            try:
+                for line in response.iter_lines():
+                    if not line.startswith(b"data:"):
+                        continue
+                    try:
+                        yield _loads(line[5:])
+                    except ValueError:
+                        continue
+            except requests.RequestException:
+                return
+
 
 # =============================================================================
 # 实时监控器
@@ -147,90 +338,301 @@ class LynxeClient:
 class TimelineMonitor:
     """实时监控任务执行并生成时间轴"""
 
-    def __init__(self, client: LynxeClient, poll_interval: float = 1.0):
+    # 自适应轮询间隔的上下限（秒）
+    MIN_POLL_INTERVAL = 0.2
+    MAX_POLL_INTERVAL = 10.0
+    # 进度行重绘间隔（秒），即 10Hz
+    PAINT_INTERVAL = 0.1
+    _STATUS_DONE = f"{'✅ 完成':<8}"
+
+    def __init__(self, client: LynxeClient, poll_interval: float = 1.0, use_sse: bool = True):
         self.client = client
         self.poll_interval = poll_interval
+        self.use_sse = use_sse
         self.start_time = None
         self.last_printed_step = 0
         self.total_steps_estimate = 0  # 预估总步骤数
         self.spinner_frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
         self.spinner_idx = 0
+        # 预先格式化好的状态列（每个旋转帧一份），以及上次的进度段缓存
+        self._status_frames = [f"{f'{frame} 运行':<8}" for frame in self.spinner_frames]
+        self._progress_key: Optional[tuple] = None
+        self._progress_segment = ""
+        # 进度行由后台绘制线程按固定帧率重绘，主线程只更新最新快照；
+        # 两个线程都会写 stdout，输出需加锁
+        self._paint_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._painter_thread: Optional[threading.Thread] = None
+        self._latest: Optional[Dict[str, Any]] = None
+        # 轮询时在本地合并增量得到的步骤列表
+        self._sequence: List[Dict[str, Any]] = []
 
     def monitor(self, plan_id: str, verbose: bool = True) -> Optional[Dict[str, Any]]:
         """
         监控任务执行，显示实时进度条和详细步骤信息
 
-        轮询逻辑：
-        1. 每 poll_interval 秒调用一次 get_execution_details()
-        2. 检查 completed 状态
-        3. 实时打印当前进度（带进度条）
-        4. 完成后返回完整数据
+        监控逻辑：
+        1. 先获取一次详情，任务已完成时直接返回，不进入推送/轮询
+        2. 优先订阅 SSE 推送，收到新步骤/完成事件时立即刷新
+        3. SSE 不可用（404 等）或流提前结束时回退到轮询，
+           轮询间隔从 poll_interval 起随任务活跃度自适应调整
+        4. 实时打印当前进度（带进度条）
+        5. 完成后返回完整数据
         """
-        self.start_time = time.time()
-        last_step_count = 0
-        last_output_line = ""
-
-        if verbose:
-            print(f"\n🚀 开始监控任务: {plan_id}")
-            print("=" * 70)
-            # 打印表头
-            print(f"{'状态':<8} {'进度':<30} {'步骤':<20} {'耗时'}")
-            print("-" * 70)
+        self.start_time = time.monotonic()
+        self.last_printed_step = 0
+        self._latest = None
+        self._sequence = []
 
         try:
-            while True:
-                details = self.client.get_execution_details(plan_id)
-
-                if details is None:
-                    if verbose:
-                        print(f"\r❌ 任务 {plan_id} 不存在" + " " * 40)
-                    return None
-
-                # 检查是否有新步骤
-                agent_sequence = details.get("agentExecutionSequence", [])
-                current_step_count = len(agent_sequence)
-
-                # 更新总步骤数预估
-                if current_step_count > self.total_steps_estimate:
-                    self.total_steps_estimate = current_step_count
+            details = self.client.get_execution_details(plan_id)
+            if details is None:
+                if verbose:
+                    print(f"❌ 任务 {plan_id} 不存在")
+                return None
 
-                # 实时更新进度条（即使在同一步骤内也更新）
+            agent_sequence = details.get("agentExecutionSequence", [])
+            if details.get("completed", False):
+                # 开始监控前已完成：输出各步骤详情和最终进度，跳过表头、动画和等待
                 if verbose:
-                    progress_info = self._get_progress_info(details, agent_sequence)
-                    # 使用 \r 实现同行更新，显示动态进度
-                    sys.stdout.write(f"\r{progress_info}")
-                    sys.stdout.flush()
+                    step_count = len(agent_sequence)
+                    parts = ["\n"]
+                    for i, step in enumerate(agent_sequence):
+                        parts.append(self._format_step(step, i + 1, step_count))
+                        parts.append("\n\n")
+                    sys.stdout.write("".join(parts))
+                    self.last_printed_step = step_count
+                    total_time = TimelineVisualizer._calculate_total_duration(details)
+                    print(self._get_final_progress(total_time, step_count))
+                    print(f"✅ 任务 {plan_id} 已完成！执行耗时: {total_time:.2f}秒 | 步骤数: {len(agent_sequence)}")
+                return details
 
-                # 检查是否有新步骤完成
-                if current_step_count > last_step_count:
-                    if verbose:
-                        # 新步骤完成，打印详细信息
-                        print()  # 换行，保留进度条显示
-                        for i in range(last_step_count, current_step_count):
-                            self._print_step(agent_sequence[i], i + 1, current_step_count)
-                            print()  # 步骤后空行
-                    last_step_count = current_step_count
-
-                # 检查是否完成
-                if details.get("completed", False):
-                    total_time = time.time() - self.start_time
-                    if verbose:
-                        # 打印最终进度条
-                        final_progress = self._get_final_progress(total_time, current_step_count)
-                        print(f"\r{final_progress}")
-                        print("=" * 70)
-                        print(f"✅ 任务完成！总耗时: {total_time:.2f}秒 | 步骤数: {current_step_count}")
-                    return details
-
-                # 等待下一次轮询
-                time.sleep(self.poll_interval)
+            if verbose:
+                print(f"\n🚀 开始监控任务: {plan_id}")
+                print("=" * 70)
+                # 打印表头
+                print(f"{'状态':<8} {'进度':<30} {'步骤':<20} {'耗时'}")
+                print("-" * 70)
+
+                self._start_painter()
+
+            # 首次获取的步骤作为起点，之后只需要增量
+            self._sequence = list(agent_sequence)
+            self._apply_details(details, verbose)
+
+            if self.use_sse:
+                stream = self.client.stream_events(plan_id)
+                if stream is not None:
+                    finished, details = self._follow_stream(plan_id, stream, verbose)
+                    if finished:
+                        return details
+            return self._poll(plan_id, verbose)
 
         except KeyboardInterrupt:
+            self._stop_painter()
             if verbose:
                 print(f"\n\n⚠️  监控已中断 (Ctrl+C)")
-                print(f"   已完成步骤: {last_step_count}")
+                print(f"   已完成步骤: {self.last_printed_step}")
             return None
 
+        finally:
+            self._stop_painter()
+
+    def _follow_stream(self, plan_id: str, stream: Iterator[Dict[str, Any]], verbose: bool):
+        """
+        按 SSE 事件驱动更新进度
+
+        返回 (是否结束, 执行详情)；流在完成前中断或收到 error 事件时返回 (False, None)，由调用方回退到轮询
+        """
+        sequence: List[Dict[str, Any]] = []
+        for event in stream:
+            event_type = event.get("type")
+            if event_type == "progress":
+                # 绘制线程可能正持有上一版列表，追加时构造新列表
+                sequence = sequence + (event.get("newSteps") or [])
+                details = {
+                    "rootPlanId": event.get("planId", plan_id),
+                    "currentPlanId": event.get("currentPlanId"),
+                    "completed": False,
+                    "agentExecutionSequence": sequence,
+                }
+                self._apply_details(details, verbose)
+            elif event_type == "done":
+                # 推送的步骤可能不是最终状态，完成后拉取一次完整详情
+                details = self.client.get_execution_details(plan_id)
+                if details is None:
+                    break
+                if self._apply_details(details, verbose):
+                    return True, details
+                break
+            elif event_type == "error":
+                # 推送出错时回退到轮询，由轮询确认任务是否存在
+                if verbose:
+                    with self._paint_lock:
+                        print(f"\x1b[2K\r⚠️  推送中断: {event.get('message', '未知错误')}，改为轮询")
+                break
+        return False, None
+
+    def _poll(self, plan_id: str, verbose: bool) -> Optional[Dict[str, Any]]:
+        """
+        轮询 get_execution_details() 直到任务完成
+
+        轮询间隔自适应：有新步骤或新 Think-Act 记录时减半（下限 MIN_POLL_INTERVAL），
+        空闲时按 1.5 倍增长（上限 MAX_POLL_INTERVAL），初始值为 poll_interval
+        """
+        interval = self.poll_interval
+        last_activity = None
+        last_response = None
+        while True:
+            # 只请求本地还没有的步骤和 Think-Act 记录
+            since_turn = len(self._sequence[-1].get("thinkActSteps") or []) if self._sequence else 0
+            response = self.client.get_execution_details(
+                plan_id,
+                since_step=len(self._sequence),
+                since_turn=since_turn
+            )
+
+            if response is None:
+                self._stop_painter()
+                if verbose:
+                    print(f"\x1b[2K\r❌ 任务 {plan_id} 不存在")
+                return None
+
+            # 304 命中时返回的是同一个对象，内容未变化，跳过重绘
+            if response is last_response:
+                interval = min(self.MAX_POLL_INTERVAL, interval * 1.5)
+                time.sleep(interval)
+                continue
+            last_response = response
+
+            details = self._merge_delta(plan_id, response)
+            if details.get("completed", False) and details is not response:
+                # 增量不含最终结果等字段，完成后拉取一次完整详情
+                details = self.client.get_execution_details(plan_id) or details
+
+            if self._apply_details(details, verbose):
+                return details
+
+            # 活动签名：(步骤数, Think-Act 记录总数)
+            agent_sequence = details.get("agentExecutionSequence", [])
+            activity = (
+                len(agent_sequence),
+                sum(len(step.get("thinkActSteps") or []) for step in agent_sequence)
+            )
+            if activity != last_activity:
+                if last_activity is not None:
+                    interval = max(self.MIN_POLL_INTERVAL, interval / 2)
+                last_activity = activity
+            else:
+                interval = min(self.MAX_POLL_INTERVAL, interval * 1.5)
+
+            # 等待下一次轮询
+            time.sleep(interval)
+
+    def _merge_delta(self, plan_id: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        """把增量响应合并到 self._sequence，返回合并后的执行详情"""
+        if "agentExecutionSequence" in response:
+            # 服务端不支持增量参数，返回的是完整详情
+            self._sequence = list(response.get("agentExecutionSequence") or [])
+            return response
+
+        step_offset = response.get("stepOffset", 0)
+        steps = response.get("steps") or []
+        if steps and step_offset < len(self._sequence):
+            # 第一个返回步骤只带 turnOffset 之后的记录，之前的沿用本地已有的；
+            # 响应对象同时存放在客户端的 ETag 缓存里，复制后再改
+            turn_offset = response.get("turnOffset", 0)
+            held_turns = self._sequence[step_offset].get("thinkActSteps") or []
+            first = dict(steps[0])
+            first["thinkActSteps"] = held_turns[:turn_offset] + (steps[0].get("thinkActSteps") or [])
+            steps = [first] + steps[1:]
+
+        # 绘制线程通过 self._latest 读取旧列表，这里构造新列表后在锁内替换，不原地修改
+        sequence = self._sequence[:step_offset] + steps
+        with self._paint_lock:
+            self._sequence = sequence
+
+        return {
+            "rootPlanId": response.get("rootPlanId", plan_id),
+            "currentPlanId": response.get("currentPlanId"),
+            "completed": response.get("completed", False),
+            "agentExecutionSequence": sequence,
+        }
+
+    def _apply_details(self, details: Dict[str, Any], verbose: bool) -> bool:
+        """根据最新执行详情刷新进度条、打印新步骤，任务完成时返回 True"""
+        with self._paint_lock:
+            self._latest = details
+
+            # 检查是否有新步骤
+            agent_sequence = details.get("agentExecutionSequence", [])
+            current_step_count = len(agent_sequence)
+
+            # 更新总步骤数预估
+            if current_step_count > self.total_steps_estimate:
+                self.total_steps_estimate = current_step_count
+
+            # 检查是否有新步骤完成
+            last_step_count = self.last_printed_step
+            if current_step_count > last_step_count:
+                if verbose:
+                    # 新步骤完成，先刷新一次进度行，再把所有新步骤的详细信息一次写出
+                    self._paint_progress(details, flush=False)
+                    parts = ["\n"]  # 换行，保留进度条显示
+                    for i in range(last_step_count, current_step_count):
+                        parts.append(self._format_step(agent_sequence[i], i + 1, current_step_count))
+                        parts.append("\n\n")  # 步骤后空行
+                    sys.stdout.write("".join(parts))
+                    sys.stdout.flush()
+                self.last_printed_step = current_step_count
+
+            # 检查是否完成
+            if details.get("completed", False):
+                # 最终进度由主线程打印，绘制线程不再重绘
+                self._stop.set()
+                total_time = time.monotonic() - self.start_time
+                if verbose:
+                    # 打印最终进度条
+                    final_progress = self._get_final_progress(total_time, current_step_count)
+                    print(f"\x1b[2K\r{final_progress}")
+                    print("=" * 70)
+                    print(f"✅ 任务完成！总耗时: {total_time:.2f}秒 | 步骤数: {current_step_count}")
+                return True
+            return False
+
+    # =========================================================================
+    # 进度行绘制（固定 10Hz，与轮询/推送频率解耦）
+    # =========================================================================
+
+    def _start_painter(self):
+        """启动后台绘制线程"""
+        self._stop.clear()
+        self._painter_thread = threading.Thread(target=self._painter, daemon=True)
+        self._painter_thread.start()
+
+    def _stop_painter(self):
+        """停止后台绘制线程并等待其退出"""
+        self._stop.set()
+        if self._painter_thread is not None:
+            self._painter_thread.join()
+            self._painter_thread = None
+
+    def _painter(self):
+        """按 PAINT_INTERVAL 重绘最新快照的进度行"""
+        while not self._stop.wait(self.PAINT_INTERVAL):
+            with self._paint_lock:
+                if self._latest is not None and not self._stop.is_set():
+                    self._paint_progress(self._latest)
+
+    def _paint_progress(self, details: Dict[str, Any], flush: bool = True):
+        """原地重绘进度行（调用方需持有 _paint_lock）"""
+        progress_info = self._get_progress_info(details, details.get("agentExecutionSequence", []))
+        # \x1b[2K 先清除整行，避免上一帧较长时残留字符
+        sys.stdout.write(f"\x1b[2K\r{progress_info}")
+        # 进度行不以换行结尾，单独重绘时需要 flush 才能显示
+        if flush:
+            sys.stdout.flush()
+
     def _get_progress_info(self, details: Dict[str, Any], agent_sequence: List[Dict]) -> str:
         """获取当前进度信息字符串"""
         # 获取当前正在运行的步骤
@@ -242,39 +644,44 @@ class TimelineMonitor:
             self.total_steps_estimate = max(current_step_count, 3)
 
         total_steps = max(self.total_steps_estimate, current_step_count)
+        raw_step_name = agent_sequence[-1].get("stepName", "Processing...") if agent_sequence else None
 
-        # 计算进度百分比
-        progress_percent = min(100, int((current_step_count / total_steps) * 100)) if total_steps > 0 else 0
+        # 进度条和步骤名只在步骤/状态变化时重建，其余帧只替换旋转字符和耗时
+        key = (current_step_count, total_steps, completed, raw_step_name)
+        if key != self._progress_key:
+            self._progress_key = key
+            self._progress_segment = self._build_progress_segment(
+                current_step_count, total_steps, raw_step_name
+            )
 
         # 计算已用时间
-        elapsed = time.time() - self.start_time
+        elapsed = time.monotonic() - self.start_time
 
         # 判断当前状态
         if completed:
-            status = "✅ 完成"
-            spinner = "✓"
+            status = self._STATUS_DONE
         else:
-            spinner = self.spinner_frames[self.spinner_idx % len(self.spinner_frames)]
+            status = self._status_frames[self.spinner_idx % len(self._status_frames)]
             self.spinner_idx += 1
-            status = f"{spinner} 运行"
+
+        # 格式: [状态] [进度条] 百分% | 步骤名 | 已用时间
+        return f"{status} {self._progress_segment} | {elapsed:5.1f}s"
+
+    @staticmethod
+    def _build_progress_segment(current_step_count: int, total_steps: int, raw_step_name: Optional[str]) -> str:
+        """构建进度条 + 百分比 + 步骤名这一段"""
+        # 计算进度百分比
+        progress_percent = min(100, int((current_step_count / total_steps) * 100)) if total_steps > 0 else 0
 
         # 构建进度条
         bar_width = 20
         filled = int(bar_width * progress_percent / 100)
         bar = "█" * filled + "░" * (bar_width - filled)
 
-        # 当前步骤名称
-        if agent_sequence:
-            current_step = agent_sequence[-1]
-            step_name = current_step.get("stepName", "Processing...")
-            # 截断过长的步骤名
-            if len(step_name) > 18:
-                step_name = step_name[:15] + "..."
-        else:
-            step_name = "初始化..."
+        # 当前步骤名称（截断过长的步骤名）
+        step_name = _shorten(raw_step_name, 18) if raw_step_name is not None else "初始化..."
 
-        # 格式: [状态] [进度条] 百分% | 步骤名 | 已用时间
-        return f"{status:<8} [{bar}] {progress_percent:3d}% | {step_name:<18} | {elapsed:5.1f}s"
+        return f"[{bar}] {progress_percent:3d}% | {step_name:<18}"
 
     def _get_final_progress(self, total_time: float, step_count: int) -> str:
         """获取完成时的最终进度字符串"""
@@ -282,11 +689,11 @@ class TimelineMonitor:
         bar = "█" * bar_width
         return f"{'✅ 完成':<8} [{bar}] 100% | {step_count} 步骤 | {total_time:5.1f}s"
 
-    def _print_step(self, step: Dict[str, Any], index: int, total_steps: int):
-        """打印单个步骤的详细信息"""
+    def _format_step(self, step: Dict[str, Any], index: int, total_steps: int) -> str:
+        """生成单个步骤的详细信息（多行文本，由调用方一次写出）"""
         step_name = step.get("stepName", f"Step {index}")
-        start_time = self._parse_time(step.get("startTime"))
-        end_time = self._parse_time(step.get("endTime"))
+        start_time = _parse_time(step.get("startTime"))
+        end_time = _parse_time(step.get("endTime"))
 
         if start_time and end_time:
             duration = (end_time - start_time).total_seconds()
@@ -307,9 +714,9 @@ class TimelineMonitor:
         # 缩进显示层级
         indent = "  "
 
-        print(f"{indent}[{index}/{total_steps}] {status_icon} {status_text}: {step_name} ({duration:.2f}s)")
+        lines = [f"{indent}[{index}/{total_steps}] {status_icon} {status_text}: {step_name} ({duration:.2f}s)"]
 
-        # 打印 Think-Act 记录（如果有）
+        # 显示 Think-Act 记录（如果有）
         think_act_steps = step.get("thinkActSteps", [])
         if think_act_steps:
             for ta in think_act_steps:
@@ -317,8 +724,8 @@ class TimelineMonitor:
                 think_input = ta.get("thinkInput", "")
                 if think_input:
                     # 显示思考内容（截断）
-                    truncated = think_input[:60] + "..." if len(think_input) > 60 else think_input
-                    print(f"{indent}    💭 Turn {turn}: {truncated}")
+                    truncated = _shorten(think_input, 60)
+                    lines.append(f"{indent}    💭 Turn {turn}: {truncated}")
 
                 # 显示工具调用
                 tool_calls = ta.get("actToolInfoList", [])
@@ -326,7 +733,9 @@ class TimelineMonitor:
                     tool_name = tc.get("toolName", "unknown")
                     exec_status = tc.get("toolExecuteStatus", "unknown")
                     icon = "✅" if exec_status == "success" else "❌"
-                    print(f"{indent}    {icon} {tool_name}")
+                    lines.append(f"{indent}    {icon} {tool_name}")
+
+        return "\n".join(lines)
 
     def _step_has_error(self, step: Dict[str, Any]) -> bool:
         """检查步骤是否有错误"""
@@ -340,22 +749,21 @@ class TimelineMonitor:
                     return True
         return False
 
-    @staticmethod
-    def _parse_time(time_str: Optional[str]) -> Optional[datetime]:
-        """解析时间字符串"""
-        if not time_str:
-            return None
-        try:
-            # Java LocalDateTime 格式: 2025-01-21T12:34:56.123456
-            return datetime.fromisoformat(time_str.replace("Z", "+00:00"))
-        except (ValueError, AttributeError):
-            return None
-
 
 # =============================================================================
 # 时间轴可视化器
 # =============================================================================
 
+class _StepInfo(NamedTuple):
+    """单个步骤的派生值，与步骤序列按下标平行存放"""
+    # 步骤时长（秒）
+    duration: float
+    # 是否有失败的工具调用或 error-report-tool 调用
+    has_error: bool
+    # ErrorAnalyzer 需要分析的工具调用
+    error_tools: List[Dict[str, Any]]
+
+
 class TimelineVisualizer:
     """生成多种格式的时间轴可视化"""
 
@@ -366,10 +774,95 @@ class TimelineVisualizer:
             "running": "🔄",
             "error": "🔥"
         }
+        self._error_analyzer = ErrorAnalyzer()
+
+    # render_* / stream_* 的 collect_errors 参数：传入列表时，渲染每个步骤的同时
+    # 把 ErrorAnalyzer.analyze 格式的错误追加进去，省去单独的一次错误分析遍历。
+    # stream_* 是惰性的，列表在输出被完全消费后才完整。
+
+    def render_ascii_timeline(self, execution_data: Dict[str, Any], collect_errors: Optional[List] = None) -> str:
+        """渲染 ASCII 时间轴"""
+        return "".join(self.stream_ascii_timeline(execution_data, collect_errors))
+
+    def render_markdown(self, execution_data: Dict[str, Any], collect_errors: Optional[List] = None) -> str:
+        """渲染 Markdown 报告"""
+        return "".join(self.stream_markdown(execution_data, collect_errors))
 
-    def render_ascii_timeline(self, execution_data: Dict[str, Any]) -> str:
+    def render_html(self, execution_data: Dict[str, Any], collect_errors: Optional[List] = None) -> str:
+        """渲染 HTML 报告"""
+        return "".join(self.stream_html(execution_data, collect_errors))
+
+    # =========================================================================
+    # 流式渲染：逐块产出文本，可直接写入文件而不在内存中拼出整份报告
+    # =========================================================================
+
+    def stream_ascii_timeline(
+        self,
+        execution_data: Dict[str, Any],
+        collect_errors: Optional[List] = None
+    ) -> Iterator[str]:
+        """逐块产出 ASCII 时间轴"""
+        infos = self._annotate(execution_data)
+        return self._join_lines(self._ascii_lines(execution_data, infos, collect_errors))
+
+    def stream_markdown(
+        self,
+        execution_data: Dict[str, Any],
+        collect_errors: Optional[List] = None
+    ) -> Iterator[str]:
+        """逐块产出 Markdown 报告"""
+        infos = self._annotate(execution_data)
+        return self._join_lines(self._markdown_lines(execution_data, infos, collect_errors))
+
+    def stream_html(
+        self,
+        execution_data: Dict[str, Any],
+        collect_errors: Optional[List] = None
+    ) -> Iterator[str]:
+        """逐块产出 HTML 报告"""
+        infos = self._annotate(execution_data)
+        return self._join_lines(self._html_lines(execution_data, infos, collect_errors))
+
+    @staticmethod
+    def _annotate(execution_data: Dict[str, Any]) -> List[_StepInfo]:
+        """
+        遍历一次步骤序列，算出渲染和错误分析共用的派生值，按步骤下标返回
+
+        结果是与 agentExecutionSequence 平行的列表，不修改 API 返回的步骤字典
         """
-        渲染 ASCII 时间轴
+        return [TimelineVisualizer._step_info(step) for step in execution_data.get("agentExecutionSequence", [])]
+
+    @staticmethod
+    def _step_info(step: Dict[str, Any]) -> _StepInfo:
+        """计算单个步骤的时长、错误标记和需要分析的工具调用"""
+        has_error = False
+        error_tools = []
+        for ta in step.get("thinkActSteps", []):
+            for tc in ta.get("actToolInfoList", []):
+                tool_name = tc.get("toolName", "")
+                failed = tc.get("toolExecuteStatus") != "success"
+                if failed or "error-report-tool" in tool_name:
+                    has_error = True
+                if failed or "error" in tool_name.lower():
+                    error_tools.append(tc)
+        return _StepInfo(TimelineVisualizer._calculate_step_duration(step), has_error, error_tools)
+
+    @staticmethod
+    def _join_lines(lines: Iterator[str]) -> Iterator[str]:
+        """在行之间插入换行，效果同 "\n".join(lines)，但不构造中间列表"""
+        separator = ""
+        for line in lines:
+            yield separator + line
+            separator = "\n"
+
+    def _ascii_lines(
+        self,
+        execution_data: Dict[str, Any],
+        infos: List[_StepInfo],
+        collect_errors: Optional[List] = None
+    ) -> Iterator[str]:
+        """
+        逐行产出 ASCII 时间轴
 
         输出示例：
         ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -383,44 +876,42 @@ class TimelineVisualizer:
             ├─ 💭: "Checking data format"
             └─ 🔧: error-report-tool → Error: Invalid format
         """
-        lines = []
         agent_sequence = execution_data.get("agentExecutionSequence", [])
 
         if not agent_sequence:
-            return "📭 无执行记录"
+            yield "📭 无执行记录"
+            return
 
         total_duration = self._calculate_total_duration(execution_data)
         timeline_length = 60
 
         # 绘制时间轴头
-        lines.append("━" * timeline_length)
-        lines.append(f"00:00{' ' * (timeline_length - 20)}{self._format_duration(total_duration)}")
-        lines.append("│")
+        yield "━" * timeline_length
+        yield f"00:00{' ' * (timeline_length - 20)}{self._format_duration(total_duration)}"
+        yield "│"
 
         # 绘制每个步骤
-        for i, step in enumerate(agent_sequence):
-            step_line = self._render_step(step, i + 1, is_last=(i == len(agent_sequence) - 1))
-            lines.append(step_line)
+        for i, (step, info) in enumerate(zip(agent_sequence, infos)):
+            if collect_errors is not None:
+                collect_errors.extend(self._error_analyzer.analyze_step(step, i + 1, info))
+            yield from self._step_lines(step, i + 1, info, is_last=(i == len(agent_sequence) - 1))
 
-        lines.append("━" * timeline_length)
+        yield "━" * timeline_length
 
-        return "\n".join(lines)
-
-    def _render_step(self, step: Dict[str, Any], index: int, is_last: bool = False) -> str:
-        """渲染单个步骤"""
+    def _step_lines(self, step: Dict[str, Any], index: int, info: _StepInfo, is_last: bool = False) -> Iterator[str]:
+        """逐行产出单个步骤"""
         step_name = step.get("stepName", f"Step {index}")
-        duration = self._calculate_step_duration(step)
+        duration = info.duration
 
         # 判断步骤状态
         status = "✅"
-        has_error = self._step_has_error(step)
-        if has_error:
+        if info.has_error:
             status = "⚠️"
 
         prefix = "└" if is_last else "├"
         step_header = f"{prefix}─ Step {index}: {step_name} {status} ({duration:.1f}s)"
 
-        lines = [step_header]
+        yield step_header
 
         # 渲染 Think-Act 记录
         think_act_steps = step.get("thinkActSteps", [])
@@ -430,8 +921,8 @@ class TimelineVisualizer:
             # Think
             think_input = ta.get("thinkInput", "")
             if think_input:
-                truncated_think = think_input[:80] + "..." if len(think_input) > 80 else think_input
-                lines.append(f"{connector}    ├─ 💭: {truncated_think}")
+                truncated_think = _shorten(think_input, 80)
+                yield f"{connector}    ├─ 💭: {truncated_think}"
 
             # Tool Calls
             tool_calls = ta.get("actToolInfoList", [])
@@ -441,17 +932,20 @@ class TimelineVisualizer:
                 result = tc.get("result", "")
 
                 icon = "✅" if exec_status == "success" else "❌"
-                result_preview = result[:50] + "..." if result and len(result) > 50 else (result or "")
+                result_preview = _shorten(result or "", 50)
 
-                lines.append(f"{connector}    └─ 🔧: {tool_name} {icon}")
+                yield f"{connector}    └─ 🔧: {tool_name} {icon}"
                 if result_preview:
-                    lines.append(f"{connector}       → {result_preview}")
-
-        return "\n".join(lines)
+                    yield f"{connector}       → {result_preview}"
 
-    def render_markdown(self, execution_data: Dict[str, Any]) -> str:
+    def _markdown_lines(
+        self,
+        execution_data: Dict[str, Any],
+        infos: List[_StepInfo],
+        collect_errors: Optional[List] = None
+    ) -> Iterator[str]:
         """
-        渲染 Markdown 报告
+        逐行产出 Markdown 报告
 
         格式：
         # 执行报告
@@ -461,30 +955,32 @@ class TimelineVisualizer:
         - 步骤数: 3
         - 状态: ✅ 完成
         """
-        lines = ["# Agent 执行报告\n"]
+        yield "# Agent 执行报告\n"
 
         # 概览
         total_duration = self._calculate_total_duration(execution_data)
         agent_sequence = execution_data.get("agentExecutionSequence", [])
         completed = execution_data.get("completed", False)
 
-        lines.append("## 📊 概览")
-        lines.append(f"- **总耗时**: {self._format_duration(total_duration)}")
-        lines.append(f"- **步骤数**: {len(agent_sequence)}")
-        lines.append(f"- **状态**: {'✅ 完成' if completed else '🔄 运行中'}\n")
+        yield "## 📊 概览"
+        yield f"- **总耗时**: {self._format_duration(total_duration)}"
+        yield f"- **步骤数**: {len(agent_sequence)}"
+        yield f"- **状态**: {'✅ 完成' if completed else '🔄 运行中'}\n"
 
         # 时间轴
-        lines.append("## ⏱️ 时间轴")
-        lines.append("```")
-        lines.append(self.render_ascii_timeline(execution_data))
-        lines.append("```\n")
+        yield "## ⏱️ 时间轴"
+        yield "```"
+        yield from self._ascii_lines(execution_data, infos)
+        yield "```\n"
 
         # 详细步骤
-        lines.append("## 📝 详细步骤")
-        for i, step in enumerate(agent_sequence):
+        yield "## 📝 详细步骤"
+        for i, (step, info) in enumerate(zip(agent_sequence, infos)):
+            if collect_errors is not None:
+                collect_errors.extend(self._error_analyzer.analyze_step(step, i + 1, info))
             step_name = step.get("stepName", f"Step {i + 1}")
-            duration = self._calculate_step_duration(step)
-            lines.append(f"\n### 步骤 {i + 1}: {step_name} ({duration:.1f}s)")
+            duration = info.duration
+            yield f"\n### 步骤 {i + 1}: {step_name} ({duration:.1f}s)"
 
             # Think-Act 记录
             think_act_steps = step.get("thinkActSteps", [])
@@ -494,144 +990,118 @@ class TimelineVisualizer:
                 think_output = ta.get("thinkOutput", "")
 
                 if think_input:
-                    lines.append(f"\n**Turn {turn} - Think Input:**")
-                    lines.append(f"```\n{think_input}\n```")
+                    yield f"\n**Turn {turn} - Think Input:**"
+                    yield f"```\n{think_input}\n```"
 
                 if think_output:
-                    lines.append(f"\n**Turn {turn} - Think Output:**")
-                    lines.append(f"```\n{think_output}\n```")
+                    yield f"\n**Turn {turn} - Think Output:**"
+                    yield f"```\n{think_output}\n```"
 
                 # Tool Calls
                 tool_calls = ta.get("actToolInfoList", [])
                 if tool_calls:
-                    lines.append(f"\n**Tool Calls:**")
+                    yield f"\n**Tool Calls:**"
                     for tc in tool_calls:
                         tool_name = tc.get("toolName", "unknown")
                         exec_status = tc.get("toolExecuteStatus", "unknown")
                         result = tc.get("result", "")
 
-                        lines.append(f"- `{tool_name}`: **{exec_status}**")
+                        yield f"- `{tool_name}`: **{exec_status}**"
                         if result:
-                            preview = result[:200] + "..." if len(result) > 200 else result
-                            lines.append("  ```")
-                            lines.append(preview)
-                            lines.append("  ```")
-
-        return "\n".join(lines)
+                            preview = _shorten(result, 200)
+                            yield "  ```"
+                            yield preview
+                            yield "  ```"
 
-    def render_html(self, execution_data: Dict[str, Any]) -> str:
-        """渲染 HTML 报告"""
+    def _html_lines(
+        self,
+        execution_data: Dict[str, Any],
+        infos: List[_StepInfo],
+        collect_errors: Optional[List] = None
+    ) -> Iterator[str]:
+        """逐块产出 HTML 报告"""
         agent_sequence = execution_data.get("agentExecutionSequence", [])
         total_duration = self._calculate_total_duration(execution_data)
         completed = execution_data.get("completed", False)
 
-        html = ['<!DOCTYPE html>']
-        html.append('<html lang="zh-CN">')
-        html.append('<head>')
-        html.append('    <meta charset="UTF-8">')
-        html.append('    <meta name="viewport" content="width=device-width, initial-scale=1.0">')
-        html.append('    <title>Agent 执行报告</title>')
-        html.append('    <style>')
-        html.append('        body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif; margin: 20px; background: #f5f5f5; }')
-        html.append('        .container { max-width: 1000px; margin: 0 auto; background: white; padding: 20px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }')
-        html.append('        h1 { color: #333; border-bottom: 2px solid #007bff; padding-bottom: 10px; }')
-        html.append('        h2 { color: #555; margin-top: 30px; }')
-        html.append('        .overview { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; margin: 20px 0; }')
-        html.append('        .overview-item { background: #f8f9fa; padding: 15px; border-radius: 6px; border-left: 4px solid #007bff; }')
-        html.append('        .overview-item strong { display: block; color: #666; font-size: 12px; }')
-        html.append('        .overview-item span { font-size: 24px; font-weight: bold; color: #333; }')
-        html.append('        .timeline { margin: 20px 0; }')
-        html.append('        .step { margin: 15px 0; padding: 15px; background: #f8f9fa; border-radius: 6px; border-left: 4px solid #28a745; }')
-        html.append('        .step.error { border-left-color: #dc3545; }')
-        html.append('        .step-header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px; }')
-        html.append('        .step-title { font-weight: bold; font-size: 16px; }')
-        html.append('        .step-duration { color: #666; font-size: 14px; }')
-        html.append('        .think-act { margin: 10px 0; padding: 10px; background: white; border-radius: 4px; }')
-        html.append('        .think-input { color: #6c757d; font-style: italic; margin-bottom: 8px; }')
-        html.append('        .tool-call { display: flex; align-items: center; gap: 8px; padding: 8px; background: #e9ecef; border-radius: 4px; }')
-        html.append('        .tool-name { font-family: monospace; font-weight: bold; }')
-        html.append('        .tool-success { color: #28a745; }')
-        html.append('        .tool-error { color: #dc3545; }')
-        html.append('        .tool-result { margin-top: 8px; padding: 8px; background: #f8f9fa; border-radius: 4px; font-size: 12px; }')
-        html.append('    </style>')
-        html.append('</head>')
-        html.append('<body>')
-        html.append('    <div class="container">')
-        html.append('        <h1>Agent 执行报告</h1>')
+        yield _HTML_HEAD
 
         # 概览
-        html.append('        <div class="overview">')
-        html.append(f'            <div class="overview-item"><strong>总耗时</strong><span>{self._format_duration(total_duration)}</span></div>')
-        html.append(f'            <div class="overview-item"><strong>步骤数</strong><span>{len(agent_sequence)}</span></div>')
-        html.append(f'            <div class="overview-item"><strong>状态</strong><span>{"✅ 完成" if completed else "🔄 运行中"}</span></div>')
-        html.append('        </div>')
-
-        html.append('        <h2>执行时间轴</h2>')
-        html.append('        <div class="timeline">')
+        yield f"""\
+        <div class="overview">
+            <div class="overview-item"><strong>总耗时</strong><span>{self._format_duration(total_duration)}</span></div>
+            <div class="overview-item"><strong>步骤数</strong><span>{len(agent_sequence)}</span></div>
+            <div class="overview-item"><strong>状态</strong><span>{"✅ 完成" if completed else "🔄 运行中"}</span></div>
+        </div>
+        <h2>执行时间轴</h2>
+        <div class="timeline">"""
 
         # 每个步骤
-        for i, step in enumerate(agent_sequence):
-            step_name = step.get("stepName", f"Step {i + 1}")
-            duration = self._calculate_step_duration(step)
-            has_error = self._step_has_error(step)
-
-            error_class = " error" if has_error else ""
+        for i, (step, info) in enumerate(zip(agent_sequence, infos)):
+            if collect_errors is not None:
+                collect_errors.extend(self._error_analyzer.analyze_step(step, i + 1, info))
+            yield from self._html_step_lines(step, i + 1, info)
 
-            html.append(f'            <div class="step{error_class}">')
-            html.append(f'                <div class="step-header">')
-            html.append(f'                    <span class="step-title">步骤 {i + 1}: {step_name}</span>')
-            html.append(f'                    <span class="step-duration">{duration:.1f}s</span>')
-            html.append(f'                </div>')
+        yield _HTML_TAIL
 
-            # Think-Act 记录
-            think_act_steps = step.get("thinkActSteps", [])
-            for ta in think_act_steps:
-                think_input = ta.get("thinkInput", "")
-                if think_input:
-                    html.append(f'                <div class="think-act">')
-                    html.append(f'                    <div class="think-input">💭 {self._escape_html(think_input[:200])}</div>')
+    def _html_step_lines(self, step: Dict[str, Any], index: int, info: _StepInfo) -> Iterator[str]:
+        """逐块产出单个步骤的 HTML"""
+        step_name = step.get("stepName", f"Step {index}")
+        duration = info.duration
+        error_class = " error" if info.has_error else ""
 
-                tool_calls = ta.get("actToolInfoList", [])
-                for tc in tool_calls:
-                    tool_name = tc.get("toolName", "unknown")
-                    exec_status = tc.get("toolExecuteStatus", "unknown")
-                    result = tc.get("result", "")
+        yield f"""\
+            <div class="step{error_class}">
+                <div class="step-header">
+                    <span class="step-title">步骤 {index}: {step_name}</span>
+                    <span class="step-duration">{duration:.1f}s</span>
+                </div>"""
 
-                    status_class = "tool-success" if exec_status == "success" else "tool-error"
-                    status_icon = "✅" if exec_status == "success" else "❌"
+        # Think-Act 记录
+        think_act_steps = step.get("thinkActSteps", [])
+        for ta in think_act_steps:
+            think_input = ta.get("thinkInput", "")
+            if think_input:
+                yield f"""\
+                <div class="think-act">
+                    <div class="think-input">💭 {self._escape_html(think_input[:200])}</div>"""
 
-                    html.append(f'                    <div class="tool-call">')
-                    html.append(f'                        <span>{status_icon}</span>')
-                    html.append(f'                        <span class="tool-name">{self._escape_html(tool_name)}</span>')
-                    html.append(f'                        <span class="{status_class}">{exec_status}</span>')
-                    html.append(f'                    </div>')
+            tool_calls = ta.get("actToolInfoList", [])
+            for tc in tool_calls:
+                tool_name = tc.get("toolName", "unknown")
+                exec_status = tc.get("toolExecuteStatus", "unknown")
+                result = tc.get("result", "")
 
-                    if result:
-                        preview = result[:300] + "..." if len(result) > 300 else result
-                        html.append(f'                    <div class="tool-result">{self._escape_html(preview)}</div>')
+                status_class = "tool-success" if exec_status == "success" else "tool-error"
+                status_icon = "✅" if exec_status == "success" else "❌"
 
-                html.append(f'                </div>')
+                yield f"""\
+                    <div class="tool-call">
+                        <span>{status_icon}</span>
+                        <span class="tool-name">{self._escape_html(tool_name)}</span>
+                        <span class="{status_class}">{exec_status}</span>
+                    </div>"""
 
-            html.append(f'            </div>')
+                if result:
+                    preview = _shorten(result, 300)
+                    yield f'                    <div class="tool-result">{self._escape_html(preview)}</div>'
 
-        html.append('        </div>')
-        html.append('    </div>')
-        html.append('</body>')
-        html.append('</html>')
+            yield '                </div>'
 
-        return "\n".join(html)
+        yield '            </div>'
 
-    def _calculate_total_duration(self, execution_data: Dict[str, Any]) -> float:
+    @staticmethod
+    def _calculate_total_duration(execution_data: Dict[str, Any]) -> float:
         """计算总执行时长（秒）"""
         agent_sequence = execution_data.get("agentExecutionSequence", [])
         if not agent_sequence:
             return 0.0
 
-        start_time = self._parse_time(agent_sequence[0].get("startTime"))
+        start_time = _parse_time(agent_sequence[0].get("startTime"))
         end_time = None
 
         for step in agent_sequence:
-            step_end = self._parse_time(step.get("endTime"))
+            step_end = _parse_time(step.get("endTime"))
             if step_end and (end_time is None or step_end > end_time):
                 end_time = step_end
 
@@ -639,36 +1109,15 @@ class TimelineVisualizer:
             return (end_time - start_time).total_seconds()
         return 0.0
 
-    def _calculate_step_duration(self, step: Dict[str, Any]) -> float:
+    @staticmethod
+    def _calculate_step_duration(step: Dict[str, Any]) -> float:
         """计算单步时长"""
-        start = self._parse_time(step.get("startTime"))
-        end = self._parse_time(step.get("endTime"))
+        start = _parse_time(step.get("startTime"))
+        end = _parse_time(step.get("endTime"))
         if start and end:
             return (end - start).total_seconds()
         return 0.0
 
-    def _step_has_error(self, step: Dict[str, Any]) -> bool:
-        """检查步骤是否有错误"""
-        think_act_steps = step.get("thinkActSteps", [])
-        for ta in think_act_steps:
-            tool_calls = ta.get("actToolInfoList", [])
-            for tc in tool_calls:
-                if tc.get("toolExecuteStatus") != "success":
-                    return True
-                if "error-report-tool" in tc.get("toolName", ""):
-                    return True
-        return False
-
-    @staticmethod
-    def _parse_time(time_str: Optional[str]) -> Optional[datetime]:
-        """解析时间字符串"""
-        if not time_str:
-            return None
-        try:
-            return datetime.fromisoformat(time_str.replace("Z", "+00:00"))
-        except (ValueError, AttributeError):
-            return None
-
     @staticmethod
     def _format_duration(seconds: float) -> str:
         """格式化时长"""
@@ -681,17 +1130,23 @@ class TimelineVisualizer:
     @staticmethod
     def _escape_html(text: str) -> str:
         """转义 HTML 特殊字符"""
-        return (text.replace("&", "&amp;")
-                   .replace("<", "&lt;")
-                   .replace(">", "&gt;")
-                   .replace('"', "&quot;")
-                   .replace("'", "&#x27;"))
+        return text.translate(_HTML_ESCAPE)
 
 
 # =============================================================================
 # 错误分析器
 # =============================================================================
 
+# 错误关键字，一次扫描完成分类；分组顺序即分类优先级（同一消息命中多类时取靠前的）
+_ERROR_RE = re.compile(
+    r"(?P<file_not_found>file not found|no such file)"
+    r"|(?P<validation_error>validation|invalid)"
+    r"|(?P<timeout>timeout)"
+    r"|(?P<permission_error>permission)",
+    re.IGNORECASE
+)
+_ERROR_PRIORITY = {name: index for index, name in enumerate(_ERROR_RE.groupindex)}
+
 class ErrorAnalyzer:
     """分析执行过程中的错误"""
 
@@ -714,20 +1169,21 @@ class ErrorAnalyzer:
         agent_sequence = execution_data.get("agentExecutionSequence", [])
 
         for step_idx, step in enumerate(agent_sequence):
-            think_act_steps = step.get("thinkActSteps", [])
-            for ta in think_act_steps:
-                tool_calls = ta.get("actToolInfoList", [])
-                for tc in tool_calls:
-                    tool_name = tc.get("toolName", "")
-                    exec_status = tc.get("toolExecuteStatus", "")
-                    result = tc.get("result", "")
-
-                    if exec_status != "success" or "error" in tool_name.lower():
-                        error_info = self._analyze_error(tc, step_idx + 1)
-                        errors.append(error_info)
+            errors.extend(self.analyze_step(step, step_idx + 1))
 
         return errors
 
+    def analyze_step(
+        self,
+        step: Dict[str, Any],
+        step_number: int,
+        info: Optional[_StepInfo] = None
+    ) -> List[Dict[str, Any]]:
+        """分析单个步骤的错误；info 为渲染时已算出的派生值（见 TimelineVisualizer._annotate）"""
+        if info is None:
+            info = TimelineVisualizer._step_info(step)
+        return [self._analyze_error(tc, step_number) for tc in info.error_tools]
+
     def _analyze_error(self, tool_call: Dict[str, Any], step: int) -> Dict[str, Any]:
         """分析单个错误"""
         tool_name = tool_call.get("toolName", "")
@@ -746,18 +1202,13 @@ class ErrorAnalyzer:
 
     def _classify_error(self, error_message: str) -> str:
         """错误分类"""
-        error_msg_lower = error_message.lower()
-
-        if "file not found" in error_msg_lower or "no such file" in error_msg_lower:
-            return "file_not_found"
-        elif "validation" in error_msg_lower or "invalid" in error_msg_lower:
-            return "validation_error"
-        elif "timeout" in error_msg_lower:
-            return "timeout"
-        elif "permission" in error_msg_lower:
-            return "permission_error"
-        else:
-            return "unknown_error"
+        error_type = None
+        for match in _ERROR_RE.finditer(error_message):
+            if error_type is None or _ERROR_PRIORITY[match.lastgroup] < _ERROR_PRIORITY[error_type]:
+                error_type = match.lastgroup
+                if _ERROR_PRIORITY[error_type] == 0:
+                    break
+        return error_type or "unknown_error"
 
     def _suggest_fix(self, error_type: str) -> str:
         """建议修复方案"""
@@ -774,6 +1225,10 @@ class ErrorAnalyzer:
 # 命令行入口
 # =============================================================================
 
+# 报告文件写缓冲（1 MiB）：流式渲染产出大量小块，大缓冲把它们合并成少量 write 系统调用
+_OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+
 def main():
     """命令行入口"""
     parser = argparse.ArgumentParser(
@@ -789,6 +1244,9 @@ def main():
 
   # 生成 Markdown 报告
   %(prog)s --plan-id plan-xxx --output markdown --output-file report.md
+
+  # 强制使用轮询
+  %(prog)s --plan-id plan-xxx --poll
         """
     )
 
@@ -827,7 +1285,21 @@ def main():
         "--poll-interval",
         type=float,
         default=2.0,
-        help="轮询间隔（秒，默认: 2.0）"
+        help="初始轮询间隔（秒，默认: 2.0），随任务活跃度自适应调整"
+    )
+    transport = parser.add_mutually_exclusive_group()
+    transport.add_argument(
+        "--sse",
+        dest="sse",
+        action="store_true",
+        default=True,
+        help="优先使用 SSE 推送监控，服务端不支持时回退到轮询（默认）"
+    )
+    transport.add_argument(
+        "--poll",
+        dest="sse",
+        action="store_false",
+        help="仅使用定时轮询监控"
     )
     parser.add_argument(
         "--no-monitor",
@@ -845,68 +1317,69 @@ def main():
     args = parser.parse_args()
 
     # 初始化
-    client = LynxeClient(args.server)
-    monitor = TimelineMonitor(client, args.poll_interval)
     visualizer = TimelineVisualizer()
-
     plan_id = args.plan_id
 
-    # 启动新任务
-    if args.execute:
-        params = None
-        if args.params:
-            try:
-                params = json.loads(args.params)
-            except json.JSONDecodeError as e:
-                print(f"错误: JSON 参数解析失败: {e}")
-                sys.exit(1)
-
-        result = client.execute_async(
-            tool_name=args.execute,
-            replacement_params=params,
-            service_group=args.service_group
-        )
-        plan_id = result.get("planId")
-        print(f"✅ 任务已启动: {plan_id}")
-
-    # 监控任务
-    if not plan_id:
-        parser.error("必须指定 --execute 或 --plan-id")
-
-    if args.no_monitor:
-        # 直接获取结果
-        execution_data = client.get_execution_details(plan_id)
-    else:
-        # 实时监控
-        execution_data = monitor.monitor(plan_id)
+    with LynxeClient(args.server) as client:
+        monitor = TimelineMonitor(client, args.poll_interval, use_sse=args.sse)
+
+        # 启动新任务
+        if args.execute:
+            params = None
+            if args.params:
+                try:
+                    params = json.loads(args.params)
+                except json.JSONDecodeError as e:
+                    print(f"错误: JSON 参数解析失败: {e}")
+                    sys.exit(1)
+
+            result = client.execute_async(
+                tool_name=args.execute,
+                replacement_params=params,
+                service_group=args.service_group
+            )
+            plan_id = result.get("planId")
+            print(f"✅ 任务已启动: {plan_id}")
+
+        # 监控任务
+        if not plan_id:
+            parser.error("必须指定 --execute 或 --plan-id")
+
+        if args.no_monitor:
+            # 直接获取结果
+            execution_data = client.get_execution_details(plan_id)
+        else:
+            # 实时监控
+            execution_data = monitor.monitor(plan_id)
 
     if execution_data is None:
         print("❌ 获取执行详情失败")
         sys.exit(1)
 
-    # 生成输出
+    # 生成输出（流式写出，不在内存中拼出整份报告），渲染的同时收集错误
+    errors: List[Dict[str, Any]] = []
     if args.output == "console":
-        print("\n" + visualizer.render_ascii_timeline(execution_data))
+        print()
+        sys.stdout.writelines(visualizer.stream_ascii_timeline(execution_data, errors))
+        print()
     elif args.output == "markdown":
-        md = visualizer.render_markdown(execution_data)
         if args.output_file:
-            with open(args.output_file, "w", encoding="utf-8") as f:
-                f.write(md)
+            with open(args.output_file, "w", encoding="utf-8", newline="", buffering=_OUTPUT_BUFFER_SIZE) as f:
+                f.writelines(visualizer.stream_markdown(execution_data, errors))
             print(f"✅ Markdown 报告已保存到: {args.output_file}")
         else:
-            print(md)
+            sys.stdout.writelines(visualizer.stream_markdown(execution_data, errors))
+            print()
     elif args.output == "html":
-        html = visualizer.render_html(execution_data)
         if args.output_file:
-            with open(args.output_file, "w", encoding="utf-8") as f:
-                f.write(html)
+            with open(args.output_file, "w", encoding="utf-8", newline="", buffering=_OUTPUT_BUFFER_SIZE) as f:
+                f.writelines(visualizer.stream_html(execution_data, errors))
             print(f"✅ HTML 报告已保存到: {args.output_file}")
         else:
-            print(html)
+            sys.stdout.writelines(visualizer.stream_html(execution_data, errors))
+            print()
 
     # 错误分析
-    analyzer = ErrorAnalyzer()
-    errors = analyzer.analyze(execution_data)
     if errors:
         print("\n⚠️ 发现错误:")
         for err in errors:
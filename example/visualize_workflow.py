@@ -1,8 +1,36 @@
+import os
 import sys
 import json
 import time
+import random
+import bisect
+import operator
 import requests
+from requests.adapters import HTTPAdapter
 import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj):
+        return json.dumps(obj).encode("utf-8")
+
+# Optional: parse the details response straight off the socket, keeping only the step fields we print
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Optional: stream the multipart upload in chunks instead of building the whole body in memory
+try:
+    from requests_toolbelt.multipart.encoder import MultipartEncoder
+except ImportError:
+    MultipartEncoder = None
 
 # Configuration
 BASE_URL = "http://localhost:18080"
@@ -11,23 +39,75 @@ TEST_DATA_FILE = "example/test-data/corrupted_sales.csv"
 TOOL_NAME_IN_JSON = "robust-data-repair-workflow" # Title in JSON
 # Note: internal tool name might be `data-repair-robust-data-repair-workflow` but API uses Title.
 
+DELETE_URL = f"{BASE_URL}/api/plan-template/details/planTemplate-robust-data-repair-workflow"
+IMPORT_URL = f"{BASE_URL}/api/plan-template/import-all"
+UPLOAD_URL = f"{BASE_URL}/api/file-upload/upload"
+EXEC_URL = f"{BASE_URL}/api/executor/executeByToolNameAsync"
+DETAILS_URL = f"{BASE_URL}/api/executor/details/"
+STREAM_URL = f"{BASE_URL}/api/executor/stream/"
+UPLOAD_NAME = os.path.basename(TEST_DATA_FILE)
+
+# One keep-alive session for every API call, so the poll loop reuses a single connection
+SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+SESSION.mount("http://", _ADAPTER)
+SESSION.mount("https://", _ADAPTER)
+SESSION.headers["Accept"] = "application/json"
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# start_workflow body: only uploadKey varies, so the rest is serialized once
+_START_PAYLOAD_HEAD = _dumps({
+    "toolName": TOOL_NAME_IN_JSON,
+    "serviceGroup": "data-repair",
+    "replacementParams": {
+        "file_path": "corrupted_sales.csv"
+    }
+})[:-1] + b',"uploadKey":'
+
+# (connect, read) timeouts in seconds; the poll read timeout stays below the backoff cap
+TIMEOUT = (3.05, 10)
+UPLOAD_TIMEOUT = (3.05, 30)
+POLL_TIMEOUT = (3.05, 5)
+STREAM_TIMEOUT = (3.05, 120)
+
+# Poll backoff: reset to MIN_INTERVAL on progress, grow by BACKOFF_BASE while idle
+MIN_INTERVAL = 0.25
+MAX_INTERVAL = 10.0
+BACKOFF_BASE = 1.3
+
+# Past step durations per workflow, used to place polls where steps usually finish
+HISTORY_FILE = os.path.expanduser("~/.cache/lynxe/poll_hist.json")
+HISTORY_SIZE = 200
+SCHEDULE_POINTS = 20
+
+# Full details list their steps under agentExecutionSequence, sinceStep deltas under steps
+_STEP_PREFIXES = frozenset(("agentExecutionSequence.item", "steps.item"))
+_STEP_STATE = operator.itemgetter("currentStep", "id", "status")
+_STEP_KEYS = frozenset(("currentStep", "id", "status", "agentRequest", "startTime", "thinkActSteps"))
+
 def print_header():
     print("=" * 60)
     print("🚀 Robust Data Repair Workflow Execution & Visualization")
     print("=" * 60)
     print(f"Time: {datetime.datetime.now().strftime('%H:%M:%S')}")
     print("-" * 60)
+    # Open the pooled connection now so the template import finds a warm socket
+    try:
+        SESSION.head(f"{BASE_URL}/", timeout=2)
+    except requests.RequestException:
+        pass
 
 def import_template():
     print("📦 Importing Workflow Template...")
     # Delete first to ensure clean state
-    requests.delete(f"{BASE_URL}/api/plan-template/details/planTemplate-robust-data-repair-workflow")
+    SESSION.delete(DELETE_URL, timeout=TIMEOUT)
     
-    with open(TEMPLATE_FILE, 'r') as f:
-        template_data = json.load(f)
+    with open(TEMPLATE_FILE, 'rb') as f:
+        template_data = _loads(f.read())
         
     # Wrap in list as import-all expects list
-    res = requests.post(f"{BASE_URL}/api/plan-template/import-all", json=[template_data])
+    res = SESSION.post(IMPORT_URL, data=_dumps([template_data]), headers=_JSON_HEADERS,
+                       timeout=UPLOAD_TIMEOUT)
     if res.status_code == 200:
         print("✅ Template Imported.")
     else:
@@ -37,11 +117,16 @@ def import_template():
 def upload_file():
     print("📂 Uploading Corrupted Data File...")
     with open(TEST_DATA_FILE, 'rb') as f:
-        files = {'files': (TEST_DATA_FILE.split('/')[-1], f)}
-        res = requests.post(f"{BASE_URL}/api/file-upload/upload", files=files)
+        if MultipartEncoder is None:
+            files = {'files': (UPLOAD_NAME, f)}
+            res = SESSION.post(UPLOAD_URL, files=files, timeout=UPLOAD_TIMEOUT)
+        else:
+            m = MultipartEncoder(fields={'files': (UPLOAD_NAME, f, 'text/csv')})
+            res = SESSION.post(UPLOAD_URL, data=m,
+                               headers={'Content-Type': m.content_type}, timeout=UPLOAD_TIMEOUT)
         
     if res.status_code == 200:
-        data = res.json()
+        data = _loads(res.content)
         key = data.get('uploadKey')
         print(f"✅ File Uploaded. Key: {key}")
         return key
@@ -51,17 +136,10 @@ def upload_file():
 
 def start_workflow(upload_key):
     print("▶️ Starting Workflow...")
-    payload = {
-        "toolName": TOOL_NAME_IN_JSON,
-        "serviceGroup": "data-repair",
-        "uploadKey": upload_key,
-        "replacementParams": {
-            "file_path": "corrupted_sales.csv"
-        }
-    }
-    res = requests.post(f"{BASE_URL}/api/executor/executeByToolNameAsync", json=payload)
+    payload = _START_PAYLOAD_HEAD + _dumps(upload_key) + b"}"
+    res = SESSION.post(EXEC_URL, data=payload, headers=_JSON_HEADERS, timeout=TIMEOUT)
     if res.status_code == 200:
-        data = res.json()
+        data = _loads(res.content)
         plan_id = data.get('planId')
         print(f"✅ Workflow Started. Plan ID: {plan_id}")
         return plan_id
@@ -72,81 +150,256 @@ def start_workflow(upload_key):
 def format_time_str(ts_list):
     if not ts_list: return ""
     # [Y, M, D, H, M, S, N]
-    dt = datetime.datetime(*ts_list[:6])
-    return dt.strftime("%H:%M:%S")
+    return f"{ts_list[3]:02d}:{ts_list[4]:02d}:{ts_list[5]:02d}"
+
+def ts_seconds(ts_list):
+    # [Y, M, D, H, M, S, N] -> epoch seconds
+    nanos = ts_list[6] if len(ts_list) > 6 else 0
+    return datetime.datetime(*ts_list[:6]).timestamp() + nanos / 1e9
+
+def load_step_durations():
+    try:
+        with open(HISTORY_FILE, 'rb') as f:
+            return _loads(f.read()).get(TOOL_NAME_IN_JSON, [])
+    except (OSError, ValueError, AttributeError):
+        return []
+
+def save_step_durations(durations):
+    try:
+        with open(HISTORY_FILE, 'rb') as f:
+            history = _loads(f.read())
+    except (OSError, ValueError):
+        history = {}
+    if not isinstance(history, dict):
+        history = {}
+    history[TOOL_NAME_IN_JSON] = (history.get(TOOL_NAME_IN_JSON, []) + durations)[-HISTORY_SIZE:]
+    try:
+        os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
+        with open(HISTORY_FILE, 'wb') as f:
+            f.write(_dumps(history))
+    except OSError:
+        pass
+
+def poll_schedule(durations):
+    # Poll times (seconds after a step starts) at evenly spaced quantiles of past
+    # step durations up to the 99th percentile: dense where steps usually finish
+    if not durations:
+        return []
+    durations = sorted(durations)
+    last = len(durations) - 1
+    quantiles = [k / SCHEDULE_POINTS for k in range(1, SCHEDULE_POINTS)] + [0.99]
+    return sorted({durations[round(q * last)] for q in quantiles})
+
+def next_poll_interval(interval, schedule, elapsed):
+    # Sleep until the next scheduled point for the running step; past the schedule, back off
+    i = bisect.bisect_right(schedule, elapsed)
+    if i < len(schedule):
+        return min(max(schedule[i] - elapsed, MIN_INTERVAL), MAX_INTERVAL)
+    return min(interval * BACKOFF_BASE, MAX_INTERVAL)
+
+def read_details(res):
+    if ijson is None:
+        return _loads(res.content)
+    # Stream-parse "completed", "stepOffset" and the step list, dropping the rest of the plan record
+    res.raw.decode_content = True
+    details = {}
+    builder = None
+    keep = False
+    for prefix, event, value in ijson.parse(res.raw, use_float=True):
+        if prefix in _STEP_PREFIXES:
+            if event == "start_map":
+                builder = ijson.ObjectBuilder()
+                keep = True
+            elif event == "map_key":
+                keep = value in _STEP_KEYS
+            if keep or event != "map_key":
+                builder.event(event, value)
+            if event == "end_map":
+                details.setdefault(prefix[:-len(".item")], []).append(builder.value)
+                builder = None
+        elif keep and builder is not None:
+            builder.event(event, value)
+        elif prefix in ("completed", "stepOffset"):
+            details[prefix] = value
+    return details
+
+def print_steps(steps, processed_steps):
+    # Print every step whose status differs from the one last shown for its id.
+    # processed_steps maps step id -> last printed status; returns the number printed.
+    # All lines go out in a single write, however many steps changed.
+    printed = 0
+    out = []
+    for step in steps:
+        # step_id is the specific execution id
+        try:
+            step_idx, step_id, step_status = _STEP_STATE(step)
+        except KeyError:
+            step_idx, step_id, step_status = step.get('currentStep'), step.get('id'), step.get('status')
+        
+        if processed_steps.get(step_id) != step_status:
+            processed_steps[step_id] = step_status
+            printed += 1
+            
+            # Print Step Header
+            agent_req = step.get('agentRequest')
+            if agent_req:
+                # Only the first line is shown; partition stops at the first newline
+                header = agent_req.partition('\n')[0]
+            else:
+                header = f"Step {step_idx} (Initializing...)"
+            
+            out.append(f"\n🔹 [Step {step_idx}] {header}")
+            out.append(f"   Status: {step_status}")
+            
+            if step.get('startTime'):
+                 out.append(f"   Started: {format_time_str(step.get('startTime'))}")
+            
+            # Check for Think/Act
+            think_acts = step.get('thinkActSteps', [])
+            for ta in think_acts:
+                 out.append(f"   🤔 Thinking: {ta.get('thinkOutput', '')[:100]}...")
+                 for tool in ta.get('actToolInfoList', []):
+                     t_name = tool.get('toolName')
+                     out.append(f"   🛠️  Tool Call: {t_name}")
+                     if t_name == "fs-write-file-operator":
+                         out.append(f"   ⚠️  REPAIR ACTION DETECTED: Modifying file...")
+
+            # Check for Final Result (latestMethodArgs)
+            if step_status == 'FINISHED':
+                args = step.get('latestMethodArgs')
+                out.append(f"   ✅ Finished. Result summary provided.")
+                # Could parse JSON here if needed
+    
+    if out:
+        sys.stdout.write("\n".join(out) + "\n")
+        sys.stdout.flush()
+    return printed
+
+def stream_timeline(plan_id, processed_steps):
+    # Follow the server's SSE progress stream.
+    # Returns False if the stream is unavailable or ends before the workflow does.
+    try:
+        res = SESSION.get(STREAM_URL + plan_id, stream=True,
+                          headers={"Accept": "text/event-stream"}, timeout=STREAM_TIMEOUT)
+    except requests.RequestException:
+        return False
+    
+    with res:
+        if res.status_code != 200:
+            return False
+        try:
+            for line in res.iter_lines():
+                if not line.startswith(b"data:"):
+                    continue
+                event = _loads(line[5:])
+                event_type = event.get('type')
+                
+                if event_type == 'progress':
+                    print_steps(event.get('newSteps') or [], processed_steps)
+                elif event_type == 'done':
+                    # Pushed steps may predate their final status, fetch the finished details once
+                    details_res = SESSION.get(DETAILS_URL + plan_id, timeout=TIMEOUT)
+                    if details_res.status_code != 200:
+                        return False
+                    print_steps(_loads(details_res.content).get('agentExecutionSequence', []), processed_steps)
+                    print("\n🎉 Workflow Completed Successfully!")
+                    return True
+                elif event_type == 'error':
+                    # e.g. "Plan not found" right after an async start: let polling retry
+                    print(f"Stream error: {event.get('message')}")
+                    return False
+        except (requests.RequestException, ValueError) as e:
+            print(f"Stream interrupted: {e}")
+    return False
 
 def visualize_timeline(plan_id):
     print("\n📊 Waiting for Execution Updates...\n")
     
-    processed_steps = set()
+    processed_steps = {}
+    if stream_timeline(plan_id, processed_steps):
+        return
+    
+    # No stream (or it dropped): fall back to polling the details endpoint
     last_status = ""
+    interval = MIN_INTERVAL
+    etag = None
+    finished_count = 0
+    schedule = poll_schedule(load_step_durations())
+    details_url = DETAILS_URL + plan_id
+    step_starts = {}
     
     start_time = time.time()
+    step_seen_at = start_time
     while time.time() - start_time < 120: # 2 min timeout
         try:
-            res = requests.get(f"{BASE_URL}/api/executor/details/{plan_id}")
-            if res.status_code != 200: continue
+            # Conditional GET: an unchanged plan comes back as an empty 304
+            # sinceStep: only ask for the steps from the first unfinished one onwards
+            headers = {"If-None-Match": etag} if etag else None
+            # The body is streamed, so close the response to hand the connection back to the pool
+            with SESSION.get(details_url, params={"sinceStep": finished_count + 1},
+                             headers=headers, stream=True, timeout=POLL_TIMEOUT) as res:
+                status_code = res.status_code
+                if status_code == 200:
+                    etag = res.headers.get("ETag")
+                    details = read_details(res)
+            if status_code == 304:
+                interval = next_poll_interval(interval, schedule, time.time() - step_seen_at)
+                time.sleep(interval + random.uniform(0, 0.1 * interval))
+                continue
+            if status_code != 200:
+                interval = min(interval * BACKOFF_BASE, MAX_INTERVAL)
+                time.sleep(interval)
+                continue
             
-            details = res.json()
             completed = details.get('completed', False)
-            steps = details.get('agentExecutionSequence', [])
-            steps.sort(key=lambda x: x.get('currentStep', 0))
+            if 'steps' in details:
+                steps = details['steps']
+                offset = details.get('stepOffset', finished_count)
+            else:
+                # Server without sinceStep support sends the full sequence
+                steps = details.get('agentExecutionSequence', [])[finished_count:]
+                offset = finished_count
             
-            # Check for new steps or updates
+            # Steps arrive in execution order and a FINISHED step never changes again,
+            # so the cursor only moves past leading FINISHED steps
+            printed = print_steps(steps, processed_steps)
+            i = max(0, finished_count - offset)
+            while i < len(steps) and steps[i].get('status') == 'FINISHED':
+                i += 1
+            if offset + i != finished_count:
+                step_seen_at = time.time()
+            finished_count = offset + i
             for step in steps:
-                step_idx = step.get('currentStep')
-                step_id = step.get('id') # specific execution id
-                step_status = step.get('status')
-                
-                # Unique identifier for this step state output
-                unique_key = f"{step_id}_{step_status}"
-                
-                if unique_key not in processed_steps:
-                    processed_steps.add(unique_key)
-                    
-                    # Print Step Header
-                    agent_req = step.get('agentRequest')
-                    if agent_req:
-                        req_lines = agent_req.split('\n')
-                        header = req_lines[0]
-                    else:
-                        header = f"Step {step_idx} (Initializing...)"
-                    
-                    print(f"\n🔹 [Step {step_idx}] {header}")
-                    print(f"   Status: {step_status}")
-                    
-                    if step.get('startTime'):
-                         print(f"   Started: {format_time_str(step.get('startTime'))}")
-                    
-                    # Check for Think/Act
-                    think_acts = step.get('thinkActSteps', [])
-                    for ta in think_acts:
-                         print(f"   🤔 Thinking: {ta.get('thinkOutput', '')[:100]}...")
-                         for tool in ta.get('actToolInfoList', []):
-                             t_name = tool.get('toolName')
-                             print(f"   🛠️  Tool Call: {t_name}")
-                             if t_name == "fs-write-file-operator":
-                                 print(f"   ⚠️  REPAIR ACTION DETECTED: Modifying file...")
-
-                    # Check for Final Result (latestMethodArgs)
-                    if step_status == 'FINISHED':
-                        args = step.get('latestMethodArgs')
-                        print(f"   ✅ Finished. Result summary provided.")
-                        # Could parse JSON here if needed
+                if step.get('startTime') and step.get('currentStep') is not None:
+                    step_starts[step['currentStep']] = step['startTime']
             
             if completed:
                 print("\n🎉 Workflow Completed Successfully!")
+                # Record how long each step ran (start to next start) for future schedules
+                starts = [ts_seconds(step_starts[k]) for k in sorted(step_starts)]
+                save_step_durations([b - a for a, b in zip(starts, starts[1:]) if b >= a])
                 break
-                
-            time.sleep(2)
+            
+            # Poll fast while steps are changing; otherwise follow the history schedule or back off
+            if printed:
+                interval = MIN_INTERVAL
+            else:
+                interval = next_poll_interval(interval, schedule, time.time() - step_seen_at)
+            time.sleep(interval + random.uniform(0, 0.1 * interval))
         except Exception as e:
+            # Transient server/network errors: keep polling, but back off
             print(f"Error polling: {e}")
-            break
+            interval = min(interval * BACKOFF_BASE, MAX_INTERVAL)
+            time.sleep(interval)
 
 def main():
     print_header()
-    import_template()
-    upload_key = upload_file()
+    # Template import and file upload don't depend on each other, run them in parallel
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        template_future = executor.submit(import_template)
+        upload_future = executor.submit(upload_file)
+        template_future.result()
+        upload_key = upload_future.result()
     plan_id = start_workflow(upload_key)
     visualize_timeline(plan_id)
 
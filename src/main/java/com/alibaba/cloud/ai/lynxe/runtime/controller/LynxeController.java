@@ -16,6 +16,7 @@
 package com.alibaba.cloud.ai.lynxe.runtime.controller;
 
 import java.io.IOException;
+import java.nio.charset.StandardCharsets;
 import java.nio.file.Files;
 import java.nio.file.Path;
 import java.util.ArrayList;
@@ -43,11 +44,13 @@ import org.springframework.core.io.Resource;
 import org.springframework.http.HttpStatus;
 import org.springframework.http.MediaType;
 import org.springframework.http.ResponseEntity;
+import org.springframework.util.DigestUtils;
 import org.springframework.web.bind.annotation.DeleteMapping;
 import org.springframework.web.bind.annotation.GetMapping;
 import org.springframework.web.bind.annotation.PathVariable;
 import org.springframework.web.bind.annotation.PostMapping;
 import org.springframework.web.bind.annotation.RequestBody;
+import org.springframework.web.bind.annotation.RequestHeader;
 import org.springframework.web.bind.annotation.RequestMapping;
 import org.springframework.web.bind.annotation.RequestParam;
 import org.springframework.web.bind.annotation.RestController;
@@ -85,6 +88,7 @@ import com.alibaba.cloud.ai.lynxe.runtime.service.UserInputService;
 import com.alibaba.cloud.ai.lynxe.workspace.conversation.entity.vo.Memory;
 import com.alibaba.cloud.ai.lynxe.workspace.conversation.service.MemoryService;
 import com.fasterxml.jackson.core.JsonProcessingException;
+import com.fasterxml.jackson.core.type.TypeReference;
 import com.fasterxml.jackson.databind.JsonNode;
 import com.fasterxml.jackson.databind.ObjectMapper;
 import com.fasterxml.jackson.datatype.jsr310.JavaTimeModule;
@@ -99,6 +103,11 @@ public class LynxeController implements LynxeListener<PlanExceptionEvent> {
 
 	private static final Logger logger = LoggerFactory.getLogger(LynxeController.class);
 
+	/**
+	 * Maximum number of plan IDs accepted by a single batch details request
+	 */
+	private static final int MAX_BATCH_DETAILS = 50;
+
 	private final ObjectMapper objectMapper;
 
 	private final Cache<String, Throwable> exceptionCache;
@@ -380,12 +389,21 @@ public class LynxeController implements LynxeListener<PlanExceptionEvent> {
 	/**
 	 * Get execution record overview (without detailed ThinkActRecord information) Note:
 	 * This method returns basic execution information and does not include detailed
-	 * ThinkActRecord steps for each agent execution.
+	 * ThinkActRecord steps for each agent execution. The response carries an ETag so
+	 * polling clients can send If-None-Match and receive 304 when nothing changed.
+	 * When sinceStep is given only a delta is returned, see
+	 * {@link #buildExecutionDelta(String, PlanExecutionRecord, int, int)}.
 	 * @param planId Plan ID
-	 * @return JSON representation of execution record overview
+	 * @param ifNoneMatch ETag of the representation the client already holds
+	 * @param sinceStep Number of agent steps the client already holds (optional)
+	 * @param sinceTurn Number of think-act turns the client holds for its last step
+	 * @return JSON representation of execution record overview, or of the delta
 	 */
 	@GetMapping("/details/{planId}")
-	public synchronized ResponseEntity<?> getExecutionDetails(@PathVariable("planId") String planId) {
+	public synchronized ResponseEntity<?> getExecutionDetails(@PathVariable("planId") String planId,
+			@RequestHeader(value = "If-None-Match", required = false) String ifNoneMatch,
+			@RequestParam(value = "sinceStep", required = false) Integer sinceStep,
+			@RequestParam(value = "sinceTurn", defaultValue = "0") int sinceTurn) {
 		if (planId == null || planId.trim().isEmpty()) {
 			return ResponseEntity.badRequest().body("Plan ID cannot be null or empty");
 		}
@@ -402,6 +420,169 @@ public class LynxeController implements LynxeListener<PlanExceptionEvent> {
 			return ResponseEntity.notFound().build();
 		}
 
+		preparePlanRecord(planId, planRecord);
+
+		try {
+			// Use Jackson ObjectMapper to convert object to JSON string
+			Object body = sinceStep != null ? buildExecutionDelta(planId, planRecord, sinceStep, sinceTurn)
+					: planRecord;
+			String jsonResponse = objectMapper.writeValueAsString(body);
+			String etag = "\"" + DigestUtils.md5DigestAsHex(jsonResponse.getBytes(StandardCharsets.UTF_8)) + "\"";
+			if (etag.equals(ifNoneMatch)) {
+				return ResponseEntity.status(HttpStatus.NOT_MODIFIED).eTag(etag).build();
+			}
+			return ResponseEntity.ok().eTag(etag).body(jsonResponse);
+		}
+		catch (JsonProcessingException e) {
+			logger.error("Error serializing PlanExecutionRecord to JSON for planId: {}", planId, e);
+			return ResponseEntity.status(HttpStatus.INTERNAL_SERVER_ERROR)
+				.body("Error processing request: " + e.getMessage());
+		}
+	}
+
+	/**
+	 * Build the part of a plan record a polling client does not have yet. The client
+	 * reports how many steps it holds and how many turns it holds for the last of them.
+	 * That last step may still be running, so it is sent again (stepOffset = sinceStep -
+	 * 1) with only its turns from turnOffset = sinceTurn - 1 onward; the last held turn
+	 * is included because its tool results may have been filled in since. All later
+	 * steps are sent in full. The client replaces its steps from stepOffset and, for the
+	 * first returned step, keeps its own turns before turnOffset.
+	 * @param planId Plan ID used for the lookup
+	 * @param planRecord Prepared plan record
+	 * @param sinceStep Number of agent steps the client already holds
+	 * @param sinceTurn Number of think-act turns the client holds for its last step
+	 * @return Delta with stepOffset, turnOffset, stepCount, completed and steps
+	 */
+	private Map<String, Object> buildExecutionDelta(String planId, PlanExecutionRecord planRecord, int sinceStep,
+			int sinceTurn) {
+		List<AgentExecutionRecord> agentSequence = planRecord.getAgentExecutionSequence();
+		int stepCount = agentSequence != null ? agentSequence.size() : 0;
+		int stepOffset = Math.max(0, Math.min(sinceStep - 1, stepCount));
+		int turnOffset = 0;
+
+		List<Object> steps = new ArrayList<>();
+		for (int i = stepOffset; i < stepCount; i++) {
+			AgentExecutionRecord step = agentSequence.get(i);
+			if (i == stepOffset && sinceStep > 0) {
+				// Copy the step so the cached record is not modified
+				List<ThinkActRecord> turns = step.getThinkActSteps();
+				int turnCount = turns != null ? turns.size() : 0;
+				turnOffset = Math.max(0, Math.min(sinceTurn - 1, turnCount));
+				Map<String, Object> partialStep = objectMapper.convertValue(step,
+						new TypeReference<Map<String, Object>>() {
+						});
+				partialStep.put("thinkActSteps", turns != null ? turns.subList(turnOffset, turnCount) : List.of());
+				steps.add(partialStep);
+			}
+			else {
+				steps.add(step);
+			}
+		}
+
+		Map<String, Object> delta = new HashMap<>();
+		delta.put("rootPlanId", planRecord.getRootPlanId() != null ? planRecord.getRootPlanId() : planId);
+		delta.put("currentPlanId", planRecord.getCurrentPlanId());
+		delta.put("completed", planRecord.isCompleted());
+		delta.put("stepCount", stepCount);
+		delta.put("stepOffset", stepOffset);
+		delta.put("turnOffset", turnOffset);
+		delta.put("steps", steps);
+		return delta;
+	}
+
+	/**
+	 * Get execution record overviews for multiple plans in one request
+	 * @param request Request body containing "planIds" (at most 50 IDs)
+	 * @return JSON object mapping plan ID to execution record; unknown plans are omitted
+	 */
+	@PostMapping("/details/batch")
+	public synchronized ResponseEntity<?> getExecutionDetailsBatch(@RequestBody Map<String, Object> request) {
+		if (!(request.get("planIds") instanceof List<?> planIds) || planIds.isEmpty()) {
+			return ResponseEntity.badRequest().body("planIds cannot be null or empty");
+		}
+		if (planIds.size() > MAX_BATCH_DETAILS) {
+			return ResponseEntity.badRequest().body("planIds cannot contain more than " + MAX_BATCH_DETAILS + " IDs");
+		}
+
+		Map<String, PlanExecutionRecord> records = new HashMap<>();
+		for (Object planIdObj : planIds) {
+			String planId = String.valueOf(planIdObj);
+			PlanExecutionRecord planRecord = planHierarchyReaderService.readPlanTreeByRootId(planId);
+			if (planRecord != null) {
+				preparePlanRecord(planId, planRecord);
+				records.put(planId, planRecord);
+			}
+		}
+
+		try {
+			return ResponseEntity.ok(objectMapper.writeValueAsString(records));
+		}
+		catch (JsonProcessingException e) {
+			logger.error("Error serializing PlanExecutionRecords to JSON for planIds: {}", planIds, e);
+			return ResponseEntity.status(HttpStatus.INTERNAL_SERVER_ERROR)
+				.body("Error processing request: " + e.getMessage());
+		}
+	}
+
+	/**
+	 * Get agent execution steps starting at a cursor, so polling clients only receive
+	 * what changed since their last request. The returned cursor is the number of
+	 * leading steps that have finished (endTime set); those steps no longer change, so
+	 * the client keeps them and asks again from the cursor. Steps after the cursor are
+	 * still running and are sent again on the next request.
+	 * @param planId Plan ID
+	 * @param since Number of leading steps the client already holds as finished
+	 * @return JSON object with cursor, stepCount, completed and steps from since onward;
+	 * 404 with a JSON body carrying planId when the plan is not (yet) known, so clients
+	 * can tell it apart from a server without this endpoint
+	 */
+	@GetMapping("/events/{planId}")
+	public synchronized ResponseEntity<?> getExecutionEventsSince(@PathVariable("planId") String planId,
+			@RequestParam(value = "since", defaultValue = "0") int since) {
+		if (planId == null || planId.trim().isEmpty()) {
+			return ResponseEntity.badRequest().body("Plan ID cannot be null or empty");
+		}
+		PlanExecutionRecord planRecord = planHierarchyReaderService.readPlanTreeByRootId(planId);
+
+		if (planRecord == null) {
+			return ResponseEntity.status(HttpStatus.NOT_FOUND)
+				.body(Map.of("error", "Plan not found: " + planId, "planId", planId));
+		}
+
+		List<AgentExecutionRecord> agentSequence = planRecord.getAgentExecutionSequence();
+		int stepCount = agentSequence != null ? agentSequence.size() : 0;
+		int from = Math.max(0, Math.min(since, stepCount));
+
+		int cursor = from;
+		while (cursor < stepCount && agentSequence.get(cursor).getEndTime() != null) {
+			cursor++;
+		}
+
+		Map<String, Object> eventsData = new HashMap<>();
+		eventsData.put("planId", planRecord.getRootPlanId() != null ? planRecord.getRootPlanId() : planId);
+		eventsData.put("cursor", cursor);
+		eventsData.put("stepCount", stepCount);
+		eventsData.put("completed", planRecord.isCompleted());
+		eventsData.put("steps", agentSequence != null ? agentSequence.subList(from, stepCount) : List.of());
+
+		try {
+			return ResponseEntity.ok(objectMapper.writeValueAsString(eventsData));
+		}
+		catch (JsonProcessingException e) {
+			logger.error("Error serializing execution events to JSON for planId: {}", planId, e);
+			return ResponseEntity.status(HttpStatus.INTERNAL_SERVER_ERROR)
+				.body("Error processing request: " + e.getMessage());
+		}
+	}
+
+	/**
+	 * Merge user input wait state, root plan ID and final result into a plan record
+	 * before it is returned to the client
+	 * @param planId Plan ID used for the lookup
+	 * @param planRecord Plan record to update in place
+	 */
+	private void preparePlanRecord(String planId, PlanExecutionRecord planRecord) {
 		// Check for user input wait state and merge it into the plan record
 		// Since form input tools are now stored by root plan ID, check using the root
 		// plan ID
@@ -427,26 +608,14 @@ public class LynxeController implements LynxeListener<PlanExceptionEvent> {
 			logger.info("Set rootPlanId to currentPlanId for plan: {}", planId);
 		}
 
-		// Extract the last tool call result when planRecord is not null and completed is
-		// true
-		if (planRecord != null && planRecord.isCompleted()) {
+		// Extract the last tool call result when the plan is completed
+		if (planRecord.isCompleted()) {
 			String lastToolCallResult = extractLastToolCallResult(planRecord);
 			if (lastToolCallResult != null) {
 				planRecord.setStructureResult(lastToolCallResult);
 				logger.info("Extracted last tool call result and set structureResult for completed plan: {}", planId);
 			}
 		}
-
-		try {
-			// Use Jackson ObjectMapper to convert object to JSON string
-			String jsonResponse = objectMapper.writeValueAsString(planRecord);
-			return ResponseEntity.ok(jsonResponse);
-		}
-		catch (JsonProcessingException e) {
-			logger.error("Error serializing PlanExecutionRecord to JSON for planId: {}", planId, e);
-			return ResponseEntity.status(HttpStatus.INTERNAL_SERVER_ERROR)
-				.body("Error processing request: " + e.getMessage());
-		}
 	}
 
 	/**